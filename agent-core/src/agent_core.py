@@ -4,14 +4,35 @@ Agent Core - Main entry point for incident investigation
 This module provides a clean API for initiating incident investigations.
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, Any, Optional
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
 
-from models.schemas import IncidentEvent, InvestigationResult
-from orchestrator import InvestigationOrchestrator
+import boto3
+
+from .models.schemas import IncidentEvent, InvestigationResult
+from .orchestrator import InvestigationOrchestrator
 
 logger = logging.getLogger(__name__)
 
+# CloudWatch event fields kept with the incident. The alarm configuration and
+# previous state are left out so they aren't copied through every incident payload.
+_RAW_EVENT_KEYS = ('id', 'source', 'detail-type', 'time', 'account', 'region', 'resources')
+_RAW_EVENT_DETAIL_KEYS = ('alarmName', 'state')
+
+# Alarms on the same service+metric within this many seconds are investigated once
+DEFAULT_ALARM_DEDUP_WINDOW_SECONDS = 300
+
+# Marker preceding the threshold in alarm reasons: "... than the threshold (THRESHOLD)"
+_THRESHOLD_MARKER = 'threshold ('
+
+# SQS FIFO queue that investigation workers consume (see submit_investigation)
+INVESTIGATION_QUEUE_URL = os.environ.get('INVESTIGATION_QUEUE_URL')
+
 
 class AgentCore:
     """
@@ -46,6 +67,9 @@ class AgentCore:
             model_id=model_id
         )
 
+        # Investigations currently running, by incident ID (single-flight)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
         logger.info("Agent Core initialized")
 
     async def investigate_incident(
@@ -77,22 +101,140 @@ class AgentCore:
         """
         try:
             # Parse incident event
-            incident = IncidentEvent(**incident_data)
+            incident = IncidentEvent.model_validate(incident_data)
 
             logger.info(
-                f"Starting investigation for incident {incident.incident_id} "
-                f"(service: {incident.service})"
+                "Starting investigation for incident %s (service: %s)",
+                incident.incident_id,
+                incident.service
             )
 
             # Run investigation workflow
-            result = await self.orchestrator.investigate(incident)
+            result = await self._run_investigation(incident)
 
             return result
 
         except Exception as e:
-            logger.error(f"Failed to investigate incident: {str(e)}", exc_info=True)
+            logger.error("Failed to investigate incident: %s", e, exc_info=True)
             raise
 
+    async def investigate_incidents(
+        self,
+        incidents_data: List[Dict[str, Any]]
+    ) -> List[InvestigationResult]:
+        """
+        Investigate several independent incidents concurrently
+
+        The stages of one investigation depend on each other (triage feeds
+        analysis, analysis feeds diagnosis, ...), so the fan-out happens across
+        incidents: total time is close to the slowest investigation instead of
+        the sum of all of them.
+
+        Args:
+            incidents_data: List of incident data dictionaries
+
+        Returns:
+            List of InvestigationResult, in the same order as incidents_data
+        """
+        # Validate all incidents up front so a malformed one fails fast instead
+        # of cancelling investigations that are already running
+        incidents = [IncidentEvent.model_validate(incident_data) for incident_data in incidents_data]
+
+        logger.info("Starting %d concurrent investigations", len(incidents))
+
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(self._run_investigation(incident))
+                for incident in incidents
+            ]
+
+        return [task.result() for task in tasks]
+
+    async def _run_investigation(self, incident: IncidentEvent) -> InvestigationResult:
+        """
+        Run the workflow for an incident, joining any run already in flight
+
+        Retries and duplicate callers for the same incident ID await the
+        first caller's investigation instead of starting another one.
+
+        Args:
+            incident: Validated incident event
+
+        Returns:
+            InvestigationResult
+        """
+        incident_id = incident.incident_id
+        task = self._inflight.get(incident_id)
+
+        if task is None:
+            task = asyncio.create_task(self.orchestrator.investigate(incident))
+            self._inflight[incident_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(incident_id, None))
+        else:
+            logger.info("Joining in-flight investigation for incident %s", incident_id)
+
+        # Shield so a cancelled caller doesn't cancel the run other callers await
+        return await asyncio.shield(task)
+
+    async def submit_investigation(
+        self,
+        incident_data: Dict[str, Any],
+        queue_url: Optional[str] = None
+    ) -> str:
+        """
+        Queue an incident for investigation by a worker and return immediately
+
+        A full investigation chains several Bedrock calls and can take minutes,
+        which would keep the caller (API Gateway, EventBridge target) open.
+        The incident is pushed to an SQS FIFO queue instead; a worker consumes
+        it with investigate_from_queue_messages. Messages are grouped and
+        deduplicated by incident ID, so resubmitting an incident doesn't queue
+        a second investigation.
+
+        Args:
+            incident_data: Incident data dictionary
+            queue_url: SQS FIFO queue URL (default: INVESTIGATION_QUEUE_URL env var)
+
+        Returns:
+            Incident ID to poll for the investigation result
+        """
+        queue_url = queue_url or INVESTIGATION_QUEUE_URL
+        if not queue_url:
+            raise ValueError("No investigation queue configured (set INVESTIGATION_QUEUE_URL)")
+
+        # Validate before queueing so bad payloads fail at submit time, not in the worker
+        incident = IncidentEvent.model_validate(incident_data)
+
+        sqs = boto3.client('sqs')
+        await asyncio.to_thread(
+            sqs.send_message,
+            QueueUrl=queue_url,
+            MessageBody=incident.model_dump_json(),
+            MessageGroupId=incident.incident_id,
+            MessageDeduplicationId=incident.incident_id
+        )
+
+        logger.info("Queued investigation for incident %s", incident.incident_id)
+        return incident.incident_id
+
+    async def investigate_from_queue_messages(
+        self,
+        records: List[Dict[str, Any]]
+    ) -> List[InvestigationResult]:
+        """
+        Investigate incidents queued by submit_investigation
+
+        Worker-side entry point for an SQS-triggered Lambda.
+
+        Args:
+            records: SQS event records (event['Records'])
+
+        Returns:
+            List of InvestigationResult, in the same order as records
+        """
+        incidents_data = [json.loads(record['body']) for record in records]
+        return await self.investigate_incidents(incidents_data)
+
     async def investigate_from_cloudwatch_event(
         self,
         cloudwatch_event: Dict[str, Any]
@@ -135,11 +277,84 @@ class AgentCore:
 
         except Exception as e:
             logger.error(
-                f"Failed to process CloudWatch event: {str(e)}",
+                "Failed to process CloudWatch event: %s",
+                e,
                 exc_info=True
             )
             raise
 
+    async def investigate_from_cloudwatch_events(
+        self,
+        cloudwatch_events: List[Dict[str, Any]],
+        dedup_window_seconds: int = DEFAULT_ALARM_DEDUP_WINDOW_SECONDS
+    ) -> List[InvestigationResult]:
+        """
+        Investigate a batch of CloudWatch alarm events
+
+        During correlated outages many alarms fire for the same service and
+        metric within seconds of each other. Only the first alarm of each
+        (service, metric) window is investigated; the remaining investigations
+        run concurrently.
+
+        Args:
+            cloudwatch_events: Raw CloudWatch alarm events from EventBridge
+            dedup_window_seconds: Window in which repeat alarms are skipped
+
+        Returns:
+            List of InvestigationResult, one per investigated alarm
+        """
+        incidents_data = sorted(
+            (self._parse_cloudwatch_event(event) for event in cloudwatch_events),
+            key=self._alarm_time
+        )
+
+        window_starts: Dict[tuple, datetime] = {}
+        to_investigate = []
+        for incident_data in incidents_data:
+            key = (incident_data['service'], incident_data['metric'])
+            alarm_time = self._alarm_time(incident_data)
+            window_start = window_starts.get(key)
+
+            if window_start and (alarm_time - window_start).total_seconds() <= dedup_window_seconds:
+                logger.info(
+                    "Skipping alarm %s: %s/%s already investigated in this window",
+                    incident_data['incident_id'],
+                    key[0],
+                    key[1]
+                )
+                continue
+
+            window_starts[key] = alarm_time
+            to_investigate.append(incident_data)
+
+        logger.info(
+            "Investigating %d of %d CloudWatch alarms after deduplication",
+            len(to_investigate),
+            len(incidents_data)
+        )
+
+        return await self.investigate_incidents(to_investigate)
+
+    @staticmethod
+    def _alarm_time(incident_data: Dict[str, Any]) -> datetime:
+        """
+        Get the alarm time of parsed incident data as an aware datetime
+
+        Args:
+            incident_data: Incident data from _parse_cloudwatch_event
+
+        Returns:
+            Alarm time (now, if the event had no usable time)
+        """
+        try:
+            alarm_time = datetime.fromisoformat(incident_data['timestamp'])
+        except (TypeError, ValueError):
+            return datetime.now(timezone.utc)
+
+        if alarm_time.tzinfo is None:
+            alarm_time = alarm_time.replace(tzinfo=timezone.utc)
+        return alarm_time
+
     def _parse_cloudwatch_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse CloudWatch alarm event to incident data
@@ -153,17 +368,11 @@ class AgentCore:
         detail = event.get('detail', {})
         alarm_name = detail.get('alarmName', 'unknown-alarm')
 
-        # Extract metric info from alarm name (e.g., "payment-service-error-rate")
-        parts = alarm_name.split('-')
-        service = parts[0] if len(parts) > 0 else 'unknown'
-        metric = parts[-1] if len(parts) > 1 else 'unknown'
-
         # Extract value and threshold from reason
         state = detail.get('state', {})
         reason = state.get('reason', '')
 
-        # Parse "1 datapoint [15.2] was greater than the threshold (5.0)"
-        value, threshold = self._parse_threshold_reason(reason)
+        service, metric, value, threshold = self._parse_alarm(alarm_name, reason)
 
         # Build incident data
         incident_data = {
@@ -180,12 +389,57 @@ class AgentCore:
             'aws_account': event.get('account'),
             'aws_region': event.get('region', 'us-east-1'),
             'tags': {},
-            'raw_event': event
+            'raw_event': self._compact_raw_event(event, detail)
         }
 
         return incident_data
 
-    def _parse_threshold_reason(self, reason: str) -> tuple[float, float]:
+    @staticmethod
+    def _compact_raw_event(event: Dict[str, Any], detail: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Keep only the parts of a CloudWatch event that identify the alarm
+
+        The event id is kept, so the full event can still be looked up from
+        EventBridge archives or the DLQ if needed.
+
+        Args:
+            event: CloudWatch alarm event
+            detail: Event detail section
+
+        Returns:
+            Compact raw event dictionary
+        """
+        compact = {key: event[key] for key in _RAW_EVENT_KEYS if key in event}
+        compact['detail'] = {key: detail[key] for key in _RAW_EVENT_DETAIL_KEYS if key in detail}
+        return compact
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse_alarm(alarm_name: str, reason: str) -> tuple[str, str, float, float]:
+        """
+        Parse service, metric, value and threshold from alarm name and reason
+
+        Cached because EventBridge retries, DLQ replays and flapping alarms
+        deliver the same alarm name and reason over and over.
+
+        Args:
+            alarm_name: CloudWatch alarm name
+            reason: Reason string from CloudWatch alarm
+
+        Returns:
+            Tuple of (service, metric, value, threshold)
+        """
+        # Extract metric info from alarm name (e.g., "payment-service-error-rate")
+        service, sep, tail = alarm_name.partition('-')
+        metric = tail.rpartition('-')[2] if sep else 'unknown'
+
+        # Parse "1 datapoint [15.2] was greater than the threshold (5.0)"
+        value, threshold = AgentCore._parse_threshold_reason(reason)
+
+        return service, metric, value, threshold
+
+    @staticmethod
+    def _parse_threshold_reason(reason: str) -> tuple[float, float]:
         """
         Parse value and threshold from alarm reason string
 
@@ -195,26 +449,47 @@ class AgentCore:
         Returns:
             Tuple of (value, threshold)
         """
-        import re
-
         # Default values
         value = 0.0
         threshold = 0.0
 
         # Try to extract numbers from reason
         # Pattern: "X datapoint [VALUE] was greater/less than the threshold (THRESHOLD)"
-        match = re.search(r'\[([0-9.]+)\].*threshold \(([0-9.]+)\)', reason)
-
-        if match:
+        # Fixed format, so plain str.find scans are enough - each runs once, left to
+        # right, so long or malformed reasons can't trigger regex backtracking
+        value_start = reason.find('[')
+        value_end = reason.find(']', value_start + 1) if value_start != -1 else -1
+        marker = reason.find(_THRESHOLD_MARKER, value_end + 1) if value_end != -1 else -1
+        threshold_start = marker + len(_THRESHOLD_MARKER)
+        threshold_end = reason.find(')', threshold_start) if marker != -1 else -1
+
+        if threshold_end != -1:
             try:
-                value = float(match.group(1))
-                threshold = float(match.group(2))
-            except (ValueError, IndexError):
-                logger.warning(f"Failed to parse numbers from reason: {reason}")
+                # Datapoints may carry a timestamp: "[15.2 (16/10/26 10:00:00)]"
+                value = float(reason[value_start + 1:value_end].split(' ', 1)[0])
+                threshold = float(reason[threshold_start:threshold_end])
+            except ValueError:
+                logger.warning("Failed to parse numbers from reason: %s", reason)
 
         return value, threshold
 
 
+@lru_cache(maxsize=8)
+def _get_agent_core(bedrock_client, mcp_client, model_id: str) -> AgentCore:
+    """
+    Get a cached AgentCore for the given clients and model
+
+    Warm Lambda containers reuse the same clients across invocations, so the
+    orchestrator, its agents and the compiled workflow are only built once.
+    Clients hash by identity, so a new client gets a fresh AgentCore.
+    """
+    return AgentCore(
+        bedrock_client=bedrock_client,
+        mcp_client=mcp_client,
+        model_id=model_id
+    )
+
+
 # Convenience function for Lambda handler
 async def investigate(
     bedrock_client,
@@ -234,10 +509,6 @@ async def investigate(
     Returns:
         InvestigationResult
     """
-    core = AgentCore(
-        bedrock_client=bedrock_client,
-        mcp_client=mcp_client,
-        model_id=model_id
-    )
+    core = _get_agent_core(bedrock_client, mcp_client, model_id)
 
     return await core.investigate_incident(incident_data)
@@ -2,25 +2,379 @@
 Analysis Agent - Investigates logs via MCP to find patterns and correlations
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 
-from models.schemas import (
+from ..models.schemas import (
     IncidentEvent,
     TriageResult,
     AnalysisResult,
     LogQueryResult
 )
-from prompts.agent_prompts import (
+from ..prompts.agent_prompts import (
     ANALYSIS_SYSTEM_PROMPT,
     format_analysis_prompt,
-    ANALYSIS_RESULTS_PROMPT_TEMPLATE
+    ANALYSIS_RESULTS_PROMPT_TEMPLATE,
+    ANALYSIS_FOLLOW_UP_INSTRUCTIONS
 )
+from ..utils import json_utils
+from ..utils.bedrock_client import bedrock_executor, check_client_pool, invoke_bedrock_stream
+from ..utils.micro_batcher import MicroBatcher
+from ..utils.response_cache import bedrock_response_cache, cache_key as response_cache_key, ratio_bucket
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of log queries in flight at once
+MAX_CONCURRENT_LOG_QUERIES = 10
+
+# CloudWatch Logs Insights limit on log groups per query
+MAX_LOG_GROUPS_PER_QUERY = 50
+
+# Records returned per log group by a search, and the Logs Insights maximum
+# for one query
+SEARCH_RESULT_LIMIT = 100
+LOGS_INSIGHTS_MAX_LIMIT = 10000
+
+# Number of generated query lists kept per agent
+QUERY_PATTERN_CACHE_SIZE = 512
+
+# Extra queries the analysis call may request after the default queries
+MAX_FOLLOW_UP_QUERIES = 3
+
+# The results prompt has a single placeholder, so it is split around it once
+# and each prompt is built with one join instead of re-parsing the template
+_RESULTS_PROMPT_HEAD, _, _RESULTS_PROMPT_TAIL = (
+    ANALYSIS_RESULTS_PROMPT_TEMPLATE.format(query_results='\0').partition('\0')
+)
+_FOLLOW_UP_INSTRUCTIONS = ANALYSIS_FOLLOW_UP_INSTRUCTIONS.format(max_queries=MAX_FOLLOW_UP_QUERIES)
+
+# Queries used when generation fails or is skipped, built once
+_DEFAULT_QUERIES: Tuple[Dict[str, Any], ...] = (
+    {
+        "name": "error_spike",
+        "query": "fields @timestamp, @message | filter @message like /ERROR|Exception|error/ | stats count() by bin(5m)",
+        "purpose": "Detect error spike timing",
+        "time_window_minutes": 120
+    },
+    {
+        "name": "error_patterns",
+        "query": "fields @timestamp, @message | filter level = 'ERROR' or @message like /ERROR/ | pattern @message | sort @sampleCount desc | limit 20",
+        "purpose": "Cluster error messages into patterns",
+        "time_window_minutes": 30
+    },
+)
+
+# Byte budget for log samples in the analysis prompt, shared across queries
+MAX_PROMPT_BYTES = 12000
+
+# Records per query considered when sampling for the analysis prompt
+MAX_RECORDS_PER_QUERY = 1000
+
+# Characters of one sample record shown in the analysis prompt
+MAX_SAMPLE_CHARS = 512
+
+# Chat log entries carried into the analysis per log group
+CHAT_LOG_ENTRIES_PER_GROUP = 100
+
+# Chat incidents with at least this many errors over a window shorter than
+# this are analyzed from the chat logs alone
+RICH_CHAT_MIN_ERRORS = 20
+RICH_CHAT_MAX_WINDOW_MINUTES = 5
+
+# Recent log query results are reused for this long
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_TTL_SECONDS = 60
+
+# Seconds to wait for one MCP log query before treating it as empty
+LOG_QUERY_TIMEOUT_SECONDS = 30
+
+# How long a list_log_groups existence check is reused
+LOG_GROUP_CACHE_TTL_SECONDS = 300
+
+# Log messages that indicate an error (HTTP 500/502/503 included)
+_ERROR_MESSAGE_RE = re.compile(
+    r'ERROR[: ]|EXCEPTION|FAIL(?:ED|URE)|50[023]|SERVICE_UNAVAILABLE|TIMEOUT',
+    re.IGNORECASE
+)
+
+# Variable parts of log messages: timestamps, UUIDs, IPv4 addresses, hex and
+# decimal numbers
+_TEMPLATE_RE = re.compile(
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'
+    r'|\b(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+    r'|\d{1,3}(?:\.\d{1,3}){3}|0x[0-9a-f]+|[0-9a-f]{16,})\b'
+    r'|\b\d+',
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
+def _is_error_message(message: str) -> bool:
+    """
+    Check whether a log message indicates an error (memoized)
+
+    Args:
+        message: Log message
+
+    Returns:
+        True if the message matches an error keyword
+    """
+    return _ERROR_MESSAGE_RE.search(message) is not None
+
+
+# Stats commands of a Logs Insights query; the last one with its optional "by" clause
+_STATS_COMMAND_RE = re.compile(r'(?:^|\|)\s*stats\s', re.IGNORECASE)
+_STATS_RE = re.compile(
+    r'((?:^|\|)\s*stats\s(?:(?!\bby\b)[^|])*)(\bby\b[^|]*)?(?=\||$)(?!.*\|\s*stats\s)',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def _group_by_log(query: str) -> str:
+    """
+    Make a stats query also group by log group
+
+    Aggregates from a multi-log-group query would otherwise be merged across
+    log groups; grouping by @log keeps them attributable.
+
+    Args:
+        query: CloudWatch Logs Insights query
+
+    Returns:
+        Query whose last stats command groups by @log
+    """
+    # A second stats only sees the first one's output, where @log is gone
+    if '@log' in query or len(_STATS_COMMAND_RE.findall(query)) != 1:
+        return query
+
+    def add_log(match) -> str:
+        stats, by_clause = match.group(1), match.group(2)
+        if by_clause:
+            return f"{stats}{by_clause.rstrip()}, @log "
+        return f"{stats.rstrip()} by @log "
+
+    return _STATS_RE.sub(add_log, query, count=1).rstrip()
+
+
+# Pattern commands and limit clauses of a Logs Insights query
+_PATTERN_COMMAND_RE = re.compile(r'(?:^|\|)\s*pattern\s', re.IGNORECASE)
+_LIMIT_RE = re.compile(r'(\|\s*limit\s+)(\d+)', re.IGNORECASE)
+
+
+def _batch_query(query: str, log_group_count: int) -> Optional[str]:
+    """
+    Rewrite a query to run across a batch of log groups, if its records can
+    be split back per log group
+
+    Stats queries are grouped by @log and raw queries must select @log.
+    Pattern queries can't be batched: their clusters don't carry @log. Any
+    limit is scaled by the batch size, since the batch shares one query.
+
+    Args:
+        query: CloudWatch Logs Insights query
+        log_group_count: Number of log groups in the batch
+
+    Returns:
+        Batched query, or None if the query must run per log group
+    """
+    batched = _group_by_log(query)
+    if '@log' not in batched or _PATTERN_COMMAND_RE.search(batched):
+        return None
+
+    return _LIMIT_RE.sub(
+        lambda match: f"{match.group(1)}{min(int(match.group(2)) * log_group_count, LOGS_INSIGHTS_MAX_LIMIT)}",
+        batched
+    )
+
+
+# Queries that only filter messages on literal alternatives, optionally
+# selecting fields and limiting, e.g.
+#   fields @timestamp, @message | filter @message like /ERROR|Exception/ | limit 50
+# (no sort: FilterLogEvents returns the oldest matches first)
+_SIMPLE_FILTER_QUERY_RE = re.compile(
+    r'\s*(?:fields\s+@?\w+(?:\s*,\s*@?\w+)*\s*\|\s*)?'
+    r'filter\s+@message\s+like\s+/([\w :-]+(?:\|[\w :-]+)*)/'
+    r'(?:\s*\|\s*limit\s+(\d+))?\s*',
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=1024)
+def _as_filter_pattern(query: str) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    Translate a plain message-filter query to a FilterLogEvents filter pattern
+
+    FilterLogEvents answers in one call, without the Logs Insights query
+    startup and polling.
+
+    Args:
+        query: CloudWatch Logs Insights query
+
+    Returns:
+        (filter pattern, limit or None), or None if the query needs Logs Insights
+    """
+    match = _SIMPLE_FILTER_QUERY_RE.fullmatch(query)
+    if not match:
+        return None
+
+    terms = match.group(1).split('|')
+    if len(terms) == 1:
+        pattern = f'"{terms[0]}"'
+    else:
+        pattern = ' '.join(f'?"{term}"' for term in terms)
+
+    return pattern, int(match.group(2)) if match.group(2) else None
+
+
+# Keywords used to infer a log level from a message with none
+_LEVEL_KEYWORD_RE = re.compile(r'ERROR|EXCEPTION|FAILED|WARN', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def _infer_level(message: str) -> str:
+    """
+    Infer a log level from message content
+
+    All keywords are found in a single scan; error keywords win over WARN
+    wherever they appear in the message. Log bursts repeat the same messages,
+    so results are memoized.
+
+    Args:
+        message: Log message
+
+    Returns:
+        'ERROR', 'WARN' or 'INFO'
+    """
+    keywords = {keyword.upper() for keyword in _LEVEL_KEYWORD_RE.findall(message)}
+    if keywords - {'WARN'}:
+        return 'ERROR'
+    if keywords:
+        return 'WARN'
+    return 'INFO'
+
+
+@lru_cache(maxsize=4096)
+def _templatize(message: str) -> str:
+    """
+    Reduce a log message to its template by masking variable parts
+
+    Args:
+        message: Log message
+
+    Returns:
+        Message with variable parts replaced by <*>
+    """
+    return _TEMPLATE_RE.sub('<*>', message)
+
+
+@dataclass(slots=True, frozen=True)
+class ChatContext:
+    """
+    Chat-query context of an incident, read from raw_event once per analysis
+    """
+
+    is_chat: bool
+    correlation_id: Optional[str] = None
+    correlation_data: Dict[str, Any] = field(default_factory=dict)
+    log_entries: List[Any] = field(default_factory=list)
+    pattern_data: Any = None
+    insights: List[Any] = field(default_factory=list)
+    question: str = ''
+    time_range_minutes: Optional[int] = None
+
+    @classmethod
+    def from_incident(cls, incident: IncidentEvent) -> 'ChatContext':
+        """
+        Extract the chat context from an incident's raw event
+
+        Args:
+            incident: Incident event
+
+        Returns:
+            ChatContext (is_chat False for alarm-triggered incidents)
+        """
+        raw_event = incident.raw_event or {}
+        is_chat = raw_event.get('source') == 'chat_query'
+        correlation_data = (raw_event.get('correlation_data') or {}) if is_chat else {}
+
+        # Use actual time range from correlation data if available
+        # Check both correlation_data and raw_event for time_range_minutes
+        time_range_minutes = (
+            correlation_data.get('time_range_minutes')
+            or correlation_data.get('total_duration_minutes')
+            or raw_event.get('time_range_minutes')
+        )
+        if isinstance(time_range_minutes, str):
+            # Ensure it's a number
+            try:
+                time_range_minutes = int(time_range_minutes)
+            except ValueError:
+                time_range_minutes = None
+
+        if not is_chat:
+            return cls(is_chat=False, time_range_minutes=time_range_minutes)
+
+        return cls(
+            is_chat=True,
+            correlation_id=raw_event.get('correlation_id'),
+            correlation_data=correlation_data,
+            log_entries=raw_event.get('log_entries') or [],
+            pattern_data=raw_event.get('pattern_data'),
+            insights=raw_event.get('insights') or [],
+            question=raw_event.get('question', ''),
+            time_range_minutes=time_range_minutes
+        )
+
+
+class _QueryGenerationBatcher(MicroBatcher):
+    """
+    Packs query-generation prompts submitted close together into one Bedrock
+    call asking for one query set per incident (see MicroBatcher)
+    """
+
+    name = "query generation"
+
+    def _build_batch_prompt(self, incidents: int, sections: str) -> str:
+        """
+        Build the combined query-generation prompt
+
+        Args:
+            incidents: Number of incidents
+            sections: The per-incident prompts
+
+        Returns:
+            Prompt asking for one query set per incident
+        """
+        return (
+            f"Generate log queries for each of the {incidents} independent incidents below, "
+            f"exactly as you would for a single incident. Respond with one JSON object: "
+            f'{{"results": [{{"queries": [...]}}, ...]}} with one element per incident, '
+            f"in the same order.\n\n{sections}"
+        )
+
+    def _result_text(self, result: Dict[str, Any]) -> str:
+        """
+        Turn one incident's result into a query-generation response
+
+        Args:
+            result: Result object for one incident
+
+        Returns:
+            Response text containing a {"queries": [...]} object
+        """
+        return json_utils.dumps({'queries': result.get('queries', [])})
+
 
 class AnalysisAgent:
     """
@@ -31,7 +385,9 @@ class AnalysisAgent:
         self,
         bedrock_client,
         mcp_client,
-        model_id: str = "anthropic.claude-sonnet-4-20250514"
+        model_id: str = "anthropic.claude-sonnet-4-20250514",
+        skip_mcp_on_rich_chat: bool = True,
+        fuse_query_generation: bool = True
     ):
         """
         Initialize Analysis Agent
@@ -40,10 +396,35 @@ class AnalysisAgent:
             bedrock_client: Boto3 Bedrock Runtime client
             mcp_client: MCP Log Analyzer client
             model_id: Bedrock model ID to use
+            skip_mcp_on_rich_chat: Analyze only the chat logs when they already
+                hold enough recent errors (see _chat_has_enough_evidence)
+            fuse_query_generation: For alarms without cached queries, run the
+                default queries and let the analysis call request follow-up
+                queries, instead of a separate query-generation call
         """
         self.bedrock_client = bedrock_client
         self.mcp_client = mcp_client
         self.model_id = model_id
+        self.skip_mcp_on_rich_chat = skip_mcp_on_rich_chat
+        self.fuse_query_generation = fuse_query_generation
+
+        check_client_pool(bedrock_client)
+
+        # LRU cache of generated queries by alert pattern (Bedrock responses
+        # are cached process-wide in bedrock_response_cache)
+        self._query_pattern_cache: OrderedDict[tuple, List[Dict[str, str]]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Batches query generation across concurrent investigations (per loop)
+        self._query_batcher: Optional[_QueryGenerationBatcher] = None
+
+        # Existing log groups by prefix: prefix -> (stored at, names)
+        self._log_group_cache: Dict[str, tuple] = {}
+
+        # Recent MCP log query results: key -> (stored at, result)
+        self._query_cache: OrderedDict[str, tuple] = OrderedDict()
+        self._query_cache_hits = 0
+        self._query_cache_misses = 0
 
     async def analyze(
         self,
@@ -70,26 +451,37 @@ class AnalysisAgent:
             # 3. Consistency between alarm-triggered and chat-triggered incidents
             
             # Check if this is from chat query (for context enhancement)
-            raw_event = incident.raw_event or {}
-            is_chat_query = raw_event.get('source') == 'chat_query'
-            correlation_id = raw_event.get('correlation_id')
+            chat = ChatContext.from_incident(incident)
             
-            if is_chat_query:
+            if chat.is_chat:
                 logger.info(
                     f"Incident from chat query - using context to enhance queries: "
-                    f"correlation_id={correlation_id}"
+                    f"correlation_id={chat.correlation_id}"
                 )
             
-            # Step 1: Generate log queries (will use chat context if available)
-            queries = await self._generate_queries(incident, triage_result)
+            allow_follow_up = False
+
+            if self.skip_mcp_on_rich_chat and self._chat_has_enough_evidence(chat):
+                # The user already handed us the evidence; analyze the chat logs only
+                logger.info("Chat context has enough recent errors, skipping query generation and MCP")
+                query_results = []
+            elif self.fuse_query_generation and not chat.is_chat and not self._has_cached_queries(incident):
+                # Skip the query-generation round-trip: run the default queries
+                # and let the analysis call ask for follow-up queries if needed
+                logger.info("Running default queries, analysis may request follow-up queries")
+                query_results = await self._execute_queries(incident, self._get_default_queries(), chat)
+                allow_follow_up = True
+            else:
+                # Step 1: Generate log queries (will use chat context if available)
+                queries = await self._generate_queries(incident, triage_result, chat)
 
-            # Step 2: Execute queries via MCP (always execute for quality)
-            query_results = await self._execute_queries(incident, queries)
+                # Step 2: Execute queries via MCP (always execute for quality)
+                query_results = await self._execute_queries(incident, queries, chat)
             
             # If chat query had existing logs, ALWAYS add them to query results
             # This ensures we have the original context from the chat, even if queries return different results
-            if is_chat_query:
-                existing_log_entries = raw_event.get('log_entries', [])
+            if chat.is_chat:
+                existing_log_entries = chat.log_entries
                 if existing_log_entries:
                     # Check if we have any actual log data in query results
                     total_query_records = sum(qr.record_count for qr in query_results)
@@ -97,46 +489,35 @@ class AnalysisAgent:
                     logger.info(f"Chat query detected: {len(existing_log_entries)} log entries available, {total_query_records} records from queries")
                     
                     # Always add chat logs - they contain the original context that triggered the incident
-                    from models.schemas import LogQueryResult
+                    from ..models.schemas import LogQueryResult
                     
-                    # Group logs by service/log_group
-                    log_groups = {}
+                    # Group logs by service/log_group and format them in one pass,
+                    # keeping at most 100 per group to avoid overwhelming
+                    log_groups: Dict[str, List[Dict[str, Any]]] = {}
+                    total_entries = 0
                     for entry in existing_log_entries:
-                        if isinstance(entry, dict):
-                            log_group = entry.get('log_group') or entry.get('@log_group') or incident.log_group
-                            if log_group not in log_groups:
-                                log_groups[log_group] = []
-                            log_groups[log_group].append(entry)
-                    
-                    # Create LogQueryResult for each log group
-                    for log_group, entries in log_groups.items():
-                        formatted_results = []
-                        for entry in entries[:100]:  # Limit to 100 per group to avoid overwhelming
-                            # Handle different log entry formats
-                            message = entry.get('message') or entry.get('@message') or entry.get('logMessage', '')
-                            message_str = str(message).upper()
-                            
+                        if not isinstance(entry, dict):
+                            continue
+
+                        total_entries += 1
+                        log_group = entry.get('log_group') or entry.get('@log_group') or incident.log_group
+                        formatted_results = log_groups.setdefault(log_group, [])
+                        if len(formatted_results) >= CHAT_LOG_ENTRIES_PER_GROUP:
+                            continue
+
+                        # Handle different log entry formats
+                        message = entry.get('message') or entry.get('@message') or entry.get('logMessage', '')
+
+                        formatted_results.append({
+                            'timestamp': entry.get('timestamp') or entry.get('@timestamp') or entry.get('timestamp_ms', 0),
+                            'message': message,  # Keep original message (not upper case)
                             # Extract level from entry or infer from message
-                            level = entry.get('level') or entry.get('@level')
-                            if not level:
-                                # Infer level from message content
-                                if 'ERROR' in message_str or 'EXCEPTION' in message_str or 'FAILED' in message_str:
-                                    level = 'ERROR'
-                                elif 'WARN' in message_str or 'WARNING' in message_str:
-                                    level = 'WARN'
-                                else:
-                                    level = 'INFO'
-                            
-                            service = entry.get('service') or entry.get('@service', 'unknown')
-                            timestamp = entry.get('timestamp') or entry.get('@timestamp') or entry.get('timestamp_ms', 0)
-                            
-                            formatted_results.append({
-                                'timestamp': timestamp,
-                                'message': message,  # Keep original message (not upper case)
-                                'level': level,  # Now properly extracted
-                                'service': service
-                            })
-                        
+                            'level': entry.get('level') or entry.get('@level') or _infer_level(str(message)),
+                            'service': entry.get('service') or entry.get('@service', 'unknown')
+                        })
+
+                    # Create LogQueryResult for each log group
+                    for log_group, formatted_results in log_groups.items():
                         service_name = log_group.split('/')[-1] if '/' in log_group else log_group
                         query_results.append(LogQueryResult(
                             query=f"chat_logs_{service_name}",
@@ -145,13 +526,15 @@ class AnalysisAgent:
                             execution_time_ms=0
                         ))
                     
-                    logger.info(f"Added {len(log_groups)} log groups from chat ({sum(len(entries) for entries in log_groups.values())} total entries)")
+                    logger.info(f"Added {len(log_groups)} log groups from chat ({total_entries} total entries)")
 
             # Step 3: Analyze query results (or existing logs)
             analysis = await self._analyze_results(
                 incident,
                 triage_result,
-                query_results
+                query_results,
+                chat,
+                allow_follow_up=allow_follow_up
             )
 
             logger.info(
@@ -171,26 +554,76 @@ class AnalysisAgent:
                 summary=f"Analysis failed: {str(e)}"
             )
 
+    @staticmethod
+    def _chat_has_enough_evidence(chat: ChatContext) -> bool:
+        """
+        Check whether chat-supplied logs are enough to analyze on their own
+
+        True for chat incidents over a short window (under
+        RICH_CHAT_MAX_WINDOW_MINUTES) whose log entries include at least
+        RICH_CHAT_MIN_ERRORS errors.
+
+        Args:
+            chat: Chat context of the incident
+
+        Returns:
+            True if fresh log queries can be skipped
+        """
+        if not chat.is_chat or not chat.time_range_minutes:
+            return False
+        if not 0 < chat.time_range_minutes < RICH_CHAT_MAX_WINDOW_MINUTES:
+            return False
+        if len(chat.log_entries) < RICH_CHAT_MIN_ERRORS:
+            return False
+
+        error_count = 0
+        for entry in chat.log_entries:
+            if not isinstance(entry, dict):
+                continue
+            message = str(entry.get('message') or entry.get('@message') or entry.get('logMessage', ''))
+            level = str(entry.get('level') or entry.get('@level') or _infer_level(message))
+            if level.upper() == 'ERROR':
+                error_count += 1
+                if error_count >= RICH_CHAT_MIN_ERRORS:
+                    return True
+
+        return False
+
     async def _generate_queries(
         self,
         incident: IncidentEvent,
-        triage_result: TriageResult
+        triage_result: TriageResult,
+        chat: ChatContext,
+        cache: bool = True
     ) -> List[Dict[str, str]]:
         """
         Generate CloudWatch Logs Insights queries
 
+        Queries generated for an alarm are reused for later alarms with the
+        same service, alert, metric and severity of threshold breach, which
+        skips the Bedrock call entirely.
+
         Args:
             incident: Incident event
             triage_result: Triage result
+            chat: Chat context of the incident
+            cache: Use cached queries/responses (False forces a refresh)
 
         Returns:
             List of queries to execute
         """
         logger.debug("Generating log queries")
 
-        # Check if this is from chat query (has existing context)
-        raw_event = incident.raw_event or {}
-        is_chat_query = raw_event.get('source') == 'chat_query'
+        # Chat queries carry their own context, so only alarms share queries
+        pattern_key = None if chat.is_chat else self._query_pattern_key(incident)
+        if cache and pattern_key:
+            with self._cache_lock:
+                cached_queries = self._query_pattern_cache.get(pattern_key)
+                if cached_queries is not None:
+                    self._query_pattern_cache.move_to_end(pattern_key)
+            if cached_queries is not None:
+                logger.info(f"Reusing {len(cached_queries)} cached queries for {pattern_key}")
+                return cached_queries
         
         # Prepare incident data
         incident_data = {
@@ -206,44 +639,150 @@ class AnalysisAgent:
         }
         
         # Add chat context if available
-        if is_chat_query:
-            correlation_id = raw_event.get('correlation_id')
-            correlation_data = raw_event.get('correlation_data')
-            log_entries = raw_event.get('log_entries', [])
-            pattern_data = raw_event.get('pattern_data')
-            insights = raw_event.get('insights', [])
-            
+        if chat.is_chat:
             incident_data['chat_context'] = {
-                'has_existing_logs': len(log_entries) > 0,
-                'log_entries_count': len(log_entries),
-                'correlation_id': correlation_id,
-                'services_involved': correlation_data.get('services_found', []) if correlation_data else [],
-                'has_patterns': pattern_data is not None,
-                'insights': insights[:5]  # Limit to 5 insights
+                'has_existing_logs': len(chat.log_entries) > 0,
+                'log_entries_count': len(chat.log_entries),
+                'correlation_id': chat.correlation_id,
+                'services_involved': chat.correlation_data.get('services_found', []),
+                'has_patterns': chat.pattern_data is not None,
+                'insights': chat.insights[:5]  # Limit to 5 insights
             }
             
             logger.info(
-                f"Using chat context: {len(log_entries)} log entries, "
-                f"correlation_id={correlation_id}, "
+                f"Using chat context: {len(chat.log_entries)} log entries, "
+                f"correlation_id={chat.correlation_id}, "
                 f"services={incident_data['chat_context']['services_involved']}"
             )
 
-        # Generate prompt
-        user_prompt = format_analysis_prompt(incident_data, triage_result.dict())
+        services = incident_data.get('chat_context', {}).get('services_involved', [])
+        triage_data = triage_result.model_dump(mode='json')
+
+        if len(services) > 1:
+            # One prompt per service, generated concurrently
+            prompts = [
+                format_analysis_prompt(
+                    {**incident_data, 'service': service, 'log_group': f"/aws/lambda/{service}"},
+                    triage_data
+                )
+                for service in services
+            ]
+            responses = await asyncio.gather(*[
+                self._call_bedrock_async(prompt, cache=cache) for prompt in prompts
+            ])
+            queries = self._dedupe_queries(
+                [query for response in responses for query in self._parse_queries(response)]
+            )
+        else:
+            # Generate prompt
+            user_prompt = format_analysis_prompt(incident_data, triage_data)
+
+            # Call Bedrock to generate queries; concurrent investigations share
+            # one call through the batcher
+            if cache:
+                response = await self._get_query_batcher().submit(user_prompt)
+            else:
+                response = await self._call_bedrock_async(user_prompt, cache=False)
 
-        # Call Bedrock to generate queries
-        response = self._call_bedrock(user_prompt)
+            # Parse queries from response
+            queries = self._parse_queries(response)
 
-        # Parse queries from response
-        queries = self._parse_queries(response)
+        # Don't pin the fallback queries to a pattern
+        if pattern_key and queries and queries != self._get_default_queries():
+            self._cache_put(self._query_pattern_cache, pattern_key, queries)
 
         logger.info(f"Generated {len(queries)} queries")
         return queries
 
+    def _get_query_batcher(self) -> _QueryGenerationBatcher:
+        """
+        Get the query-generation batcher for the running event loop
+
+        Returns:
+            _QueryGenerationBatcher bound to the current loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._query_batcher is None or self._query_batcher.loop is not loop:
+            self._query_batcher = _QueryGenerationBatcher(self._call_bedrock_async)
+        return self._query_batcher
+
+    @staticmethod
+    def _dedupe_queries(queries: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Drop queries whose text repeats an earlier one
+
+        Query text is compared with whitespace collapsed and case folded.
+
+        Args:
+            queries: Query definitions
+
+        Returns:
+            Query definitions with duplicates removed, in original order
+        """
+        seen = set()
+        unique = []
+        for query in queries:
+            normalized = ' '.join(query.get('query', '').split()).lower()
+            if normalized not in seen:
+                seen.add(normalized)
+                unique.append(query)
+        return unique
+
+    @staticmethod
+    def _query_pattern_key(incident: IncidentEvent) -> tuple:
+        """
+        Build the coarse cache key for generated queries
+
+        Metric values are bucketed by how far they exceed the threshold (see
+        ratio_bucket), so a flapping alarm maps to the same key on every
+        occurrence.
+
+        Args:
+            incident: Incident event
+
+        Returns:
+            (service, alert_name, metric, breach bucket) tuple
+        """
+        return (
+            incident.service,
+            incident.alert_name,
+            incident.metric,
+            ratio_bucket(incident.value, incident.threshold)
+        )
+
+    def _has_cached_queries(self, incident: IncidentEvent) -> bool:
+        """
+        Check whether queries for this alert pattern are already cached
+
+        Args:
+            incident: Incident event
+
+        Returns:
+            True if _generate_queries can answer without calling Bedrock
+        """
+        with self._cache_lock:
+            return self._query_pattern_key(incident) in self._query_pattern_cache
+
+    def _cache_put(self, cache: OrderedDict, key, value) -> None:
+        """
+        Store a value in one of the agent's LRU caches
+
+        Args:
+            cache: Cache to store into
+            key: Cache key
+            value: Value to store
+        """
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > QUERY_PATTERN_CACHE_SIZE:
+                cache.popitem(last=False)
+
     async def _execute_queries(
         self,
         incident: IncidentEvent,
-        queries: List[Dict[str, str]]
+        queries: List[Dict[str, str]],
+        chat: ChatContext
     ) -> List[LogQueryResult]:
         """
         Execute queries via MCP client
@@ -251,37 +790,16 @@ class AnalysisAgent:
         Args:
             incident: Incident event
             queries: List of queries to execute
+            chat: Chat context of the incident
 
         Returns:
             List of query results
         """
         logger.info(f"Executing {len(queries)} log queries")
 
-        results = []
-
         # Calculate time range - use correlation data if available
-        raw_event = incident.raw_event or {}
-        is_chat_query = raw_event.get('source') == 'chat_query'
-        correlation_data = raw_event.get('correlation_data', {}) if is_chat_query else {}
-        
         end_time = incident.timestamp
-        
-        # Use actual time range from correlation data if available
-        # Check both correlation_data and raw_event for time_range_minutes
-        time_range_minutes = None
-        if correlation_data:
-            time_range_minutes = correlation_data.get('time_range_minutes') or correlation_data.get('total_duration_minutes')
-        
-        if not time_range_minutes:
-            time_range_minutes = raw_event.get('time_range_minutes')
-        
-        if time_range_minutes:
-            # Ensure it's a number
-            if isinstance(time_range_minutes, str):
-                try:
-                    time_range_minutes = int(time_range_minutes)
-                except ValueError:
-                    time_range_minutes = None
+        time_range_minutes = chat.time_range_minutes
         
         if time_range_minutes and time_range_minutes > 0:
             start_time = end_time - timedelta(minutes=time_range_minutes)
@@ -291,80 +809,394 @@ class AnalysisAgent:
             start_time = end_time - timedelta(hours=2)
             logger.info("Using default time range: 2 hours (time_range_minutes not found or invalid)")
 
-        # Determine which log groups to query
-        log_groups_to_query = []
+        # Determine which log groups to query: services from the correlation
+        # (chat queries) plus the primary service and any extra log groups on
+        # the incident, without duplicates, in order
+        primary_log_group = incident.log_group or f"/aws/lambda/{incident.service}"
+        log_groups = {}
         
-        if is_chat_query and correlation_data.get('services_found'):
+        if chat.is_chat and chat.correlation_data.get('services_found'):
             # Query all services from correlation
-            services_found = correlation_data.get('services_found', [])
+            services_found = chat.correlation_data['services_found']
             logger.info(f"Querying {len(services_found)} services from correlation: {services_found}")
-            for service in services_found:
-                log_group = f"/aws/lambda/{service}"
-                log_groups_to_query.append(log_group)
+            log_groups = dict.fromkeys(f"/aws/lambda/{service}" for service in services_found)
         else:
-            # Default: query primary service log group
-            log_group = incident.log_group or f"/aws/lambda/{incident.service}"
-            log_groups_to_query.append(log_group)
-            logger.info(f"Querying primary service log group: {log_group}")
-
-        # Execute each query against each log group
-        for query_def in queries:
-            query_text = query_def.get('query', '')
-            query_name = query_def.get('name', 'unnamed')
-            
-            for log_group_name in log_groups_to_query:
-                try:
-                    logger.debug(f"Executing query '{query_name}' on log group '{log_group_name}'")
-
-                    # Execute via MCP
-                    if self.mcp_client:
-                        result = await self.mcp_client.search_logs(
-                            log_group_name=log_group_name,
-                            query=query_text,
-                            start_time=start_time.isoformat(),
-                            end_time=end_time.isoformat()
-                        )
-
-                        results.append(LogQueryResult(
-                            query=f"{query_name} [{log_group_name}]",
-                            results=result.get('results', []),
-                            record_count=len(result.get('results', [])),
-                            execution_time_ms=result.get('execution_time_ms')
-                        ))
-                    else:
-                        # MCP client not available - add placeholder
-                        logger.warning("MCP client not available, using placeholder")
-                        results.append(LogQueryResult(
-                            query=f"{query_name} [{log_group_name}]",
-                            results=[],
-                            record_count=0
-                        ))
-
-                except Exception as e:
-                    logger.error(f"Query execution failed for {log_group_name}: {str(e)}")
-                    # Add failed query result
-                    results.append(LogQueryResult(
-                        query=f"{query_name} [{log_group_name}]",
-                        results=[],
-                        record_count=0
-                    ))
+            logger.info(f"Querying primary service log group: {primary_log_group}")
+
+        log_groups.setdefault(primary_log_group, None)
+        log_groups.update(dict.fromkeys(incident.log_groups))
+        log_groups_to_query = list(log_groups)
+
+        # Execute each query against each log group concurrently; the calls are
+        # independent network round-trips, bounded to avoid CloudWatch throttling
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_LOG_QUERIES)
+
+        if len(log_groups_to_query) > 1 and hasattr(self.mcp_client, 'search_logs_multi'):
+            # One Logs Insights query covers up to 50 log groups, so batch them
+            log_groups_to_query = await self._existing_log_groups(log_groups_to_query)
+            log_group_batches = [
+                log_groups_to_query[i:i + MAX_LOG_GROUPS_PER_QUERY]
+                for i in range(0, len(log_groups_to_query), MAX_LOG_GROUPS_PER_QUERY)
+            ]
+            batch_results = await asyncio.gather(*[
+                self._safe_search_multi(
+                    query_def, log_group_batch, self._query_start_time(query_def, start_time, end_time),
+                    end_time, semaphore
+                )
+                for query_def in queries
+                for log_group_batch in log_group_batches
+            ])
+            results = [result for batch in batch_results for result in batch]
+        else:
+            results = await asyncio.gather(*[
+                self._safe_search(
+                    query_def, log_group_name, self._query_start_time(query_def, start_time, end_time),
+                    end_time, semaphore
+                )
+                for query_def in queries
+                for log_group_name in log_groups_to_query
+            ])
 
         logger.info(f"Completed {len(results)} query executions across {len(log_groups_to_query)} log groups")
+        logger.info(
+            f"Log query cache: {self._query_cache_hits} hits, {self._query_cache_misses} misses"
+        )
+        return results
+
+    @staticmethod
+    def _query_start_time(query_def: Dict[str, Any], start_time: datetime, end_time: datetime) -> datetime:
+        """
+        Narrow the time range to a query's own window, if it sets one
+
+        Logs Insights latency and cost scale with the data scanned, so a query
+        for the latest errors shouldn't scan the whole incident window. The
+        window never extends past the incident's time range.
+
+        Args:
+            query_def: Query definition, optionally with 'time_window_minutes'
+            start_time: Start of the incident time range
+            end_time: End of the time range
+
+        Returns:
+            Start time for this query
+        """
+        window = query_def.get('time_window_minutes')
+        if isinstance(window, (int, float)) and not isinstance(window, bool) and window > 0:
+            return max(start_time, end_time - timedelta(minutes=window))
+        return start_time
+
+    async def _safe_search(
+        self,
+        query_def: Dict[str, str],
+        log_group_name: str,
+        start_time: datetime,
+        end_time: datetime,
+        semaphore: asyncio.Semaphore
+    ) -> LogQueryResult:
+        """
+        Execute one query against one log group
+
+        Failures are returned as empty results so one bad query or log group
+        doesn't fail the rest of the batch.
+
+        Args:
+            query_def: Query definition with 'name' and 'query'
+            log_group_name: Log group to query
+            start_time: Start of the time range
+            end_time: End of the time range
+            semaphore: Limits concurrent MCP calls
+
+        Returns:
+            LogQueryResult (empty on failure)
+        """
+        query_text = query_def.get('query', '')
+        query_name = query_def.get('name', 'unnamed')
+        label = f"{query_name} [{log_group_name}]"
+
+        if not self.mcp_client:
+            # MCP client not available - add placeholder
+            logger.warning("MCP client not available, using placeholder")
+            return LogQueryResult(query=label, results=[], record_count=0)
+
+        try:
+            logger.debug("Executing query '%s' on log group '%s'", query_name, log_group_name)
+
+            # Execute via MCP
+            result = await self._cached_search([log_group_name], query_text, start_time, end_time, semaphore)
+
+            return LogQueryResult(
+                query=label,
+                results=result.get('results', []),
+                record_count=len(result.get('results', [])),
+                execution_time_ms=result.get('execution_time_ms')
+            )
+
+        except asyncio.TimeoutError:
+            logger.warning(f"Query '{query_name}' timed out after {LOG_QUERY_TIMEOUT_SECONDS}s for {log_group_name}")
+            return LogQueryResult(query=f"{label} (timed out)", results=[], record_count=0)
+
+        except Exception as e:
+            logger.error(f"Query execution failed for {log_group_name}: {str(e)}")
+            # Add failed query result
+            return LogQueryResult(query=label, results=[], record_count=0)
+
+    async def _safe_search_multi(
+        self,
+        query_def: Dict[str, str],
+        log_group_names: List[str],
+        start_time: datetime,
+        end_time: datetime,
+        semaphore: asyncio.Semaphore
+    ) -> List[LogQueryResult]:
+        """
+        Execute one query against a batch of log groups in a single call
+
+        Records are split back into one LogQueryResult per log group using the
+        '@log' field. Queries whose records can't be attributed that way (see
+        _batch_query) run per log group, as does a failed batched query, so
+        one bad log group doesn't fail the others.
+
+        Args:
+            query_def: Query definition with 'name' and 'query'
+            log_group_names: Log groups to query (at most 50)
+            start_time: Start of the time range
+            end_time: End of the time range
+            semaphore: Limits concurrent MCP calls
+
+        Returns:
+            List of LogQueryResult, one per log group
+        """
+        query_name = query_def.get('name', 'unnamed')
+        query_text = _batch_query(query_def.get('query', ''), len(log_group_names))
+
+        if query_text is None:
+            return list(await asyncio.gather(*[
+                self._safe_search(query_def, log_group_name, start_time, end_time, semaphore)
+                for log_group_name in log_group_names
+            ]))
+
+        try:
+            result = await self._cached_search(log_group_names, query_text, start_time, end_time, semaphore)
+        except asyncio.TimeoutError:
+            # Querying each log group on its own would only wait longer
+            logger.warning(
+                f"Batched query '{query_name}' timed out after {LOG_QUERY_TIMEOUT_SECONDS}s "
+                f"for {len(log_group_names)} log groups"
+            )
+            return [
+                LogQueryResult(query=f"{query_name} [{log_group_name}] (timed out)", results=[], record_count=0)
+                for log_group_name in log_group_names
+            ]
+        except Exception as e:
+            logger.warning(
+                f"Batched query '{query_name}' failed for {len(log_group_names)} log groups, "
+                f"querying individually: {str(e)}"
+            )
+            return list(await asyncio.gather(*[
+                self._safe_search(query_def, log_group_name, start_time, end_time, semaphore)
+                for log_group_name in log_group_names
+            ]))
+
+        # '@log' is "account-id:log-group-name"
+        records_by_group: Dict[str, List[Dict[str, Any]]] = {name: [] for name in log_group_names}
+        unattributed = []
+        for record in result.get('results', []):
+            log_field = record.get('@log', '') if isinstance(record, dict) else ''
+            log_group_name = log_field.partition(':')[2] or log_field
+            if log_group_name in records_by_group:
+                records_by_group[log_group_name].append(record)
+            else:
+                unattributed.append(record)
+
+        results = [
+            LogQueryResult(
+                query=f"{query_name} [{log_group_name}]",
+                results=records,
+                record_count=len(records),
+                execution_time_ms=result.get('execution_time_ms')
+            )
+            for log_group_name, records in records_by_group.items()
+        ]
+
+        if unattributed:
+            results.append(LogQueryResult(
+                query=f"{query_name} [{', '.join(log_group_names)}]",
+                results=unattributed,
+                record_count=len(unattributed),
+                execution_time_ms=result.get('execution_time_ms')
+            ))
+
         return results
 
+    async def _cached_search(
+        self,
+        log_group_names: List[str],
+        query_text: str,
+        start_time: datetime,
+        end_time: datetime,
+        semaphore: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        """
+        Run a log query via MCP, reusing a recent identical query's result
+
+        Time ranges are bucketed to the minute, so repeated chat-driven
+        investigations over the same window hit the cache. Entries live for
+        QUERY_CACHE_TTL_SECONDS; failures are not cached. A query taking over
+        LOG_QUERY_TIMEOUT_SECONDS raises asyncio.TimeoutError.
+
+        Args:
+            log_group_names: Log groups to query (one uses search_logs)
+            query_text: CloudWatch Logs Insights query
+            start_time: Start of the time range
+            end_time: End of the time range
+            semaphore: Limits concurrent MCP calls
+
+        Returns:
+            MCP search result dictionary
+        """
+        cache_key = hashlib.blake2b(
+            f"{','.join(log_group_names)}|{query_text}|"
+            f"{int(start_time.timestamp()) // 60}|{int(end_time.timestamp()) // 60}".encode(),
+            digest_size=12
+        ).hexdigest()
+
+        with self._cache_lock:
+            cached = self._query_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < QUERY_CACHE_TTL_SECONDS:
+                self._query_cache.move_to_end(cache_key)
+                self._query_cache_hits += 1
+                return cached[1]
+            self._query_cache_misses += 1
+
+        async with semaphore:
+            if len(log_group_names) == 1:
+                search = self._search_one(log_group_names[0], query_text, start_time, end_time)
+            else:
+                search = self.mcp_client.search_logs_multi(
+                    log_group_names=log_group_names,
+                    query=query_text,
+                    start_time=start_time.isoformat(),
+                    end_time=end_time.isoformat(),
+                    limit=min(SEARCH_RESULT_LIMIT * len(log_group_names), LOGS_INSIGHTS_MAX_LIMIT)
+                )
+            # A hung CloudWatch query must not hold up the whole analysis
+            result = await asyncio.wait_for(search, timeout=LOG_QUERY_TIMEOUT_SECONDS)
+
+        with self._cache_lock:
+            self._query_cache[cache_key] = (time.monotonic(), result)
+            self._query_cache.move_to_end(cache_key)
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+
+        return result
+
+    async def _search_one(
+        self,
+        log_group_name: str,
+        query_text: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[str, Any]:
+        """
+        Run a log query against one log group
+
+        Plain message filters (see _as_filter_pattern) go to FilterLogEvents,
+        which returns in one call; anything else, or a failed quick search,
+        uses Logs Insights.
+
+        Args:
+            log_group_name: Log group to query
+            query_text: CloudWatch Logs Insights query
+            start_time: Start of the time range
+            end_time: End of the time range
+
+        Returns:
+            MCP search result dictionary
+        """
+        filter_query = _as_filter_pattern(query_text)
+        if filter_query and hasattr(self.mcp_client, 'filter_log_events'):
+            filter_pattern, limit = filter_query
+            try:
+                return await self.mcp_client.filter_log_events(
+                    log_group_name=log_group_name,
+                    filter_pattern=filter_pattern,
+                    start_time=start_time.isoformat(),
+                    end_time=end_time.isoformat(),
+                    limit=limit or SEARCH_RESULT_LIMIT
+                )
+            except Exception as e:
+                logger.warning(f"Quick search failed for {log_group_name}, using Logs Insights: {str(e)}")
+
+        return await self.mcp_client.search_logs(
+            log_group_name=log_group_name,
+            query=query_text,
+            start_time=start_time.isoformat(),
+            end_time=end_time.isoformat()
+        )
+
+    async def _existing_log_groups(self, log_group_names: List[str]) -> List[str]:
+        """
+        Drop log groups that don't exist
+
+        A missing log group fails a whole batched Logs Insights query, so the
+        candidates are checked with one list_log_groups call on their common
+        prefix (cached for LOG_GROUP_CACHE_TTL_SECONDS). If the check fails or
+        is truncated, all candidates are kept.
+
+        Args:
+            log_group_names: Candidate log group names
+
+        Returns:
+            Log group names that exist
+        """
+        prefix = os.path.commonprefix(log_group_names)
+
+        cached = self._log_group_cache.get(prefix)
+        if cached and time.monotonic() - cached[0] < LOG_GROUP_CACHE_TTL_SECONDS:
+            existing = cached[1]
+        else:
+            try:
+                log_groups = await self.mcp_client.list_log_groups(prefix=prefix or None, limit=50)
+            except Exception as e:
+                logger.warning(f"Could not verify log groups, querying all of them: {str(e)}")
+                return log_group_names
+
+            if len(log_groups) >= 50:
+                return log_group_names
+
+            existing = {group.get('logGroupName') for group in log_groups}
+            self._log_group_cache[prefix] = (time.monotonic(), existing)
+
+        found = [name for name in log_group_names if name in existing]
+
+        missing = len(log_group_names) - len(found)
+        if missing:
+            logger.info(f"Skipping {missing} log groups that don't exist")
+
+        return found
+
     async def _analyze_results(
         self,
         incident: IncidentEvent,
         triage_result: TriageResult,
-        query_results: List[LogQueryResult]
+        query_results: List[LogQueryResult],
+        chat: ChatContext,
+        allow_follow_up: bool = False
     ) -> AnalysisResult:
         """
         Analyze query results to identify patterns
 
+        With allow_follow_up, the model may ask for up to MAX_FOLLOW_UP_QUERIES
+        more queries; they are run and the combined results analyzed again.
+        The default plus follow-up queries are then cached for the alert
+        pattern, so the next occurrence runs them directly.
+
         Args:
             incident: Incident event
             triage_result: Triage result
             query_results: Results from log queries
+            chat: Chat context of the incident
+            allow_follow_up: Results come from the default queries only
 
         Returns:
             AnalysisResult with findings
@@ -375,62 +1207,64 @@ class AnalysisAgent:
         results_summary = self._format_query_results(query_results)
         
         # Add context from chat if available
-        raw_event = incident.raw_event or {}
-        is_chat_query = raw_event.get('source') == 'chat_query'
         context_section = ""
         
-        if is_chat_query:
-            question = raw_event.get('question', '')
-            correlation_id = raw_event.get('correlation_id')
-            correlation_data = raw_event.get('correlation_data', {})
-            
+        if chat.is_chat:
             context_section = "\n\nCONTEXT FROM USER QUERY:\n"
-            if question:
-                context_section += f"- Original Question: {question}\n"
-            if correlation_id:
-                context_section += f"- Correlation ID: {correlation_id}\n"
-            if correlation_data.get('services_found'):
-                context_section += f"- Services Involved: {', '.join(correlation_data['services_found'])}\n"
+            if chat.question:
+                context_section += f"- Original Question: {chat.question}\n"
+            if chat.correlation_id:
+                context_section += f"- Correlation ID: {chat.correlation_id}\n"
+            if chat.correlation_data.get('services_found'):
+                context_section += f"- Services Involved: {', '.join(chat.correlation_data['services_found'])}\n"
             context_section += "- These logs were found by the user in a chat query and triggered this incident investigation.\n"
             context_section += "- Pay special attention to ERROR entries and service unavailability issues.\n"
 
         # Generate analysis prompt
-        prompt = ANALYSIS_RESULTS_PROMPT_TEMPLATE.format(
-            query_results=results_summary + context_section
-        )
+        prompt = "".join((
+            _RESULTS_PROMPT_HEAD,
+            results_summary,
+            context_section,
+            _RESULTS_PROMPT_TAIL,
+            _FOLLOW_UP_INSTRUCTIONS if allow_follow_up else ""
+        ))
 
         # Call Bedrock
-        response = self._call_bedrock(prompt)
+        response = await self._call_bedrock_async(prompt)
 
         # Parse analysis
         analysis_data = self._parse_analysis(response)
 
+        follow_up_queries = analysis_data.get('additional_queries') if allow_follow_up else None
+        if isinstance(follow_up_queries, list):
+            follow_up_queries = [
+                query for query in follow_up_queries[:MAX_FOLLOW_UP_QUERIES]
+                if isinstance(query, dict) and query.get('query')
+            ]
+            if follow_up_queries:
+                logger.info(f"Analysis requested {len(follow_up_queries)} follow-up queries")
+                self._cache_put(
+                    self._query_pattern_cache,
+                    self._query_pattern_key(incident),
+                    self._dedupe_queries(self._get_default_queries() + follow_up_queries)
+                )
+                follow_up_results = await self._execute_queries(incident, follow_up_queries, chat)
+                return await self._analyze_results(
+                    incident, triage_result, query_results + follow_up_results, chat
+                )
+
         # Count errors across all query results (more accurate than relying on LLM count)
         total_error_count = 0
         for query_result in query_results:
             for result in query_result.results:
                 if isinstance(result, dict):
-                    message = str(result.get('message', result.get('@message', ''))).upper()
-                    level = str(result.get('level', result.get('@level', ''))).upper()
-                    
-                    # Check for ERROR in multiple ways
-                    is_error = (
-                        level == 'ERROR' or
-                        'ERROR:' in message or
-                        'ERROR ' in message or
-                        'EXCEPTION' in message or
-                        'FAILED' in message or
-                        'FAILURE' in message or
-                        '502' in message or  # HTTP errors
-                        '503' in message or
-                        '500' in message or
-                        'SERVICE_UNAVAILABLE' in message or
-                        'TIMEOUT' in message
-                    )
-                    
-                    if is_error:
+                    message = str(result.get('message', result.get('@message', '')))
+                    level = str(result.get('level', result.get('@level', '')))
+
+                    # One regex scan per record instead of a chain of substring checks
+                    if level.upper() == 'ERROR' or _is_error_message(message):
                         total_error_count += 1
-                        logger.debug(f"Found error: level={level}, message={message[:100]}")
+                        logger.debug("Found error: level=%s, message=%.100s", level, message)
         
         # Use LLM's error count if it's higher (might catch patterns we miss)
         llm_error_count = analysis_data.get('error_count', 0)
@@ -450,21 +1284,54 @@ class AnalysisAgent:
             summary=analysis_data.get('summary', 'No summary available')
         )
 
-    def _call_bedrock(self, user_prompt: str) -> str:
+    async def _call_bedrock_async(self, user_prompt: str, cache: bool = True) -> str:
+        """
+        Call Bedrock Claude without blocking the event loop
+
+        The boto3 client is synchronous, so the call runs on the shared Bedrock
+        thread pool while other coroutines (MCP queries, other investigations)
+        keep making progress.
+
+        Args:
+            user_prompt: User prompt
+            cache: Use a cached response if available
+
+        Returns:
+            Response text
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(bedrock_executor, self._call_bedrock, user_prompt, cache)
+
+    def _call_bedrock(self, user_prompt: str, cache: bool = True) -> str:
         """
         Call Bedrock Claude
 
+        Responses are cached (see utils.response_cache) by a hash of the model,
+        sampling temperature and prompts, so an identical prompt doesn't go
+        back to Bedrock while the entry is fresh. Truncated or unparseable
+        responses aren't cached.
+
         Args:
             user_prompt: User prompt
+            cache: Use a cached response if available (False forces a refresh)
 
         Returns:
             Response text
         """
+        temperature = 0.3
+        cache_key = response_cache_key(self.model_id, temperature, ANALYSIS_SYSTEM_PROMPT, user_prompt)
+
+        if cache:
+            cached_response = bedrock_response_cache.get(cache_key)
+            if cached_response is not None:
+                logger.debug("Bedrock response cache hit")
+                return cached_response
+
         try:
             request_body = {
                 "anthropic_version": "bedrock-2023-05-31",
                 "max_tokens": 3000,
-                "temperature": 0.3,
+                "temperature": temperature,
                 "system": ANALYSIS_SYSTEM_PROMPT,
                 "messages": [
                     {
@@ -474,20 +1341,31 @@ class AnalysisAgent:
                 ]
             }
 
-            # Invoke model with retry logic for throttling
-            from utils.bedrock_client import invoke_bedrock_with_retry
-            
-            response = invoke_bedrock_with_retry(
+            # Stream the response with retry logic for throttling; both prompts
+            # answer with a JSON object, so stop reading once it's complete
+            response_text, stop_reason = invoke_bedrock_stream(
                 bedrock_client=self.bedrock_client,
                 model_id=self.model_id,
                 request_body=request_body,
+                stop_after_json=True,
                 max_retries=5,
                 initial_delay=2.0,
                 max_delay=30.0
             )
 
-            response_body = json.loads(response['body'].read())
-            return response_body['content'][0]['text']
+            # Only cache complete responses that parse, so a truncated or
+            # garbled answer isn't reused for the cache's TTL
+            if stop_reason == 'max_tokens':
+                logger.warning(f"Analysis response truncated at {request_body['max_tokens']} tokens, not caching it")
+                return response_text
+            try:
+                json_utils.extract_json(response_text)
+            except ValueError:
+                logger.warning("Analysis response is not valid JSON, not caching it")
+                return response_text
+
+            bedrock_response_cache.put(cache_key, response_text)
+            return response_text
 
         except Exception as e:
             logger.error(f"Bedrock invocation failed: {str(e)}", exc_info=True)
@@ -504,19 +1382,10 @@ class AnalysisAgent:
             List of query definitions
         """
         try:
-            # Extract JSON
-            if "```json" in response_text:
-                start = response_text.index("```json") + 7
-                end = response_text.index("```", start)
-                json_text = response_text[start:end].strip()
-            elif "{" in response_text:
-                start = response_text.index("{")
-                end = response_text.rindex("}") + 1
-                json_text = response_text[start:end]
-            else:
+            if "{" not in response_text:
                 return []
 
-            data = json.loads(json_text)
+            data = json_utils.extract_json(response_text)
             return data.get('queries', [])
 
         except Exception as e:
@@ -535,128 +1404,9 @@ class AnalysisAgent:
             Analysis data
         """
         try:
-            # Extract JSON
-            json_text = None
-            
-            if "```json" in response_text:
-                start = response_text.index("```json") + 7
-                end = response_text.index("```", start)
-                json_text = response_text[start:end].strip()
-                logger.debug("Extracted JSON from ```json block")
-            elif "{" in response_text:
-                start = response_text.index("{")
-                # Find matching closing brace
-                brace_count = 0
-                end = start
-                for i in range(start, len(response_text)):
-                    if response_text[i] == '{':
-                        brace_count += 1
-                    elif response_text[i] == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end = i + 1
-                            break
-                if end > start:
-                    json_text = response_text[start:end]
-                    logger.debug("Extracted JSON from { } braces")
-            
-            if not json_text:
-                json_text = response_text.strip()
-                logger.debug("Using entire response as JSON")
-            
-            # Clean and fix JSON before parsing
-            import re
-            import json as json_module
-            
-            # Log the raw JSON for debugging (first 2000 chars)
-            logger.debug(f"Raw JSON text (first 2000 chars): {json_text[:2000]}")
-            
-            # Strategy: Use json.JSONDecoder with more lenient parsing
-            # First, try to remove control characters that definitely break JSON
-            # But be careful - we need to escape them in strings, not remove them
-            
-            # Try parsing as-is first
-            try:
-                data = json_module.loads(json_text)
-            except json_module.JSONDecodeError as parse_error:
-                logger.warning(f"Initial JSON parse failed: {parse_error}")
-                logger.debug(f"Error at position {getattr(parse_error, 'pos', 'unknown')}")
-                
-                # Try to repair JSON by escaping control characters in string values
-                # This is a more sophisticated approach
-                def repair_json_string(match):
-                    """Repair a JSON string value by escaping control characters"""
-                    full_match = match.group(0)
-                    # Extract the content between quotes
-                    if len(full_match) >= 2:
-                        content = full_match[1:-1]  # Remove surrounding quotes
-                        # Escape control characters
-                        content = (content
-                                  .replace('\\', '\\\\')  # Escape backslashes first
-                                  .replace('\n', '\\n')
-                                  .replace('\r', '\\r')
-                                  .replace('\t', '\\t')
-                                  .replace('\b', '\\b')
-                                  .replace('\f', '\\f'))
-                        # Remove any remaining unprintable control characters
-                        content = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', content)
-                        return f'"{content}"'
-                    return full_match
-                
-                # Find and repair string values (content between unescaped quotes)
-                # This regex matches: "..." but not \"...\"
-                repaired_json = ""
-                i = 0
-                in_string = False
-                escape_next = False
-                
-                while i < len(json_text):
-                    char = json_text[i]
-                    
-                    if escape_next:
-                        repaired_json += char
-                        escape_next = False
-                    elif char == '\\':
-                        repaired_json += char
-                        escape_next = True
-                    elif char == '"' and not escape_next:
-                        # Start or end of string
-                        in_string = not in_string
-                        repaired_json += char
-                    elif in_string:
-                        # Inside string - escape control characters
-                        if char in ['\n', '\r', '\t', '\b', '\f']:
-                            repaired_json += {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}[char]
-                        elif ord(char) < 32 or ord(char) == 127:  # Control characters
-                            # Skip or replace with space
-                            repaired_json += ' '
-                        else:
-                            repaired_json += char
-                    else:
-                        # Outside string - keep as is (but remove control chars)
-                        if ord(char) < 32 and char not in ['\n', '\r', '\t']:
-                            # Skip control chars outside strings
-                            pass
-                        else:
-                            repaired_json += char
-                    i += 1
-                
-                json_text = repaired_json
-                logger.debug(f"Repaired JSON (first 1000 chars): {json_text[:1000]}")
-                
-                # Try parsing repaired JSON
-                try:
-                    data = json_module.loads(json_text)
-                except json_module.JSONDecodeError as second_error:
-                    error_pos = getattr(second_error, 'pos', None)
-                    logger.error(f"JSON parse still failing after repair: {second_error}")
-                    if error_pos:
-                        start = max(0, error_pos - 200)
-                        end = min(len(json_text), error_pos + 200)
-                        logger.error(f"Problematic section around position {error_pos}:")
-                        logger.error(f"{json_text[start:end]}")
-                    raise
-            
+            logger.debug("Raw analysis response (first 2000 chars): %.2000s", response_text)
+            data = json_utils.extract_json(response_text)
+
             # Ensure required fields have defaults
             if not isinstance(data, dict):
                 raise ValueError("Parsed data is not a dictionary")
@@ -666,7 +1416,6 @@ class AnalysisAgent:
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error in analysis: {str(e)}", exc_info=True)
             logger.error(f"Failed to parse JSON. Response text (first 1000 chars): {response_text[:1000]}")
-            logger.error(f"Attempted JSON text (first 500 chars): {json_text[:500] if json_text else 'None'}")
             return {
                 'error_patterns': [],
                 'error_count': 0,
@@ -685,6 +1434,12 @@ class AnalysisAgent:
         """
         Format query results for Claude
 
+        Log messages are grouped by template (variable parts such as IDs,
+        IPs, timestamps and numbers masked) so a burst of near-identical lines
+        is sent once with its count instead of line by line. Samples fill a
+        per-query share of MAX_PROMPT_BYTES, templates not already shown for
+        an earlier query first and the most frequent before rarer ones; each sample is cut to MAX_SAMPLE_CHARS.
+
         Args:
             query_results: Query results
 
@@ -692,15 +1447,55 @@ class AnalysisAgent:
             Formatted string
         """
         formatted = []
+        query_budget = MAX_PROMPT_BYTES // max(len(query_results), 1)
+        seen_templates = set()
         for i, result in enumerate(query_results, 1):
             formatted.append(f"Query {i}:")
             formatted.append(f"Query: {result.query}")
             formatted.append(f"Records found: {result.record_count}")
             if result.results:
                 formatted.append("Sample results:")
-                # Include first 10 results
-                for j, record in enumerate(result.results[:10], 1):
-                    formatted.append(f"  {j}. {json.dumps(record)}")
+
+                # Group message records by template, keeping first-seen order;
+                # rows without a message (e.g. stats) are listed as-is. Only
+                # the first MAX_RECORDS_PER_QUERY records are considered.
+                groups: Dict[Any, List] = {}
+                for record in result.results[:MAX_RECORDS_PER_QUERY]:
+                    message = record.get('message') or record.get('@message') if isinstance(record, dict) else None
+                    key = _templatize(str(message)) if message else len(groups)
+                    if key in groups:
+                        groups[key][1] += 1
+                    else:
+                        groups[key] = [record, 1]
+
+                # Fill this query's byte budget, new templates first, then the
+                # most frequent (stable sort, so identical results always give
+                # an identical prompt)
+                ordered = sorted(groups.items(), key=lambda item: (item[0] in seen_templates, -item[1][1]))
+                used = 0
+                shown = 0
+                for key, (record, count) in ordered:
+                    sample = json_utils.dumps(record)
+                    if len(sample) > MAX_SAMPLE_CHARS:
+                        sample = sample[:MAX_SAMPLE_CHARS] + "..."
+                    if isinstance(key, str):
+                        entry = f"  {shown + 1}. [x{count}] {key}\n     sample: {sample}"
+                    else:
+                        entry = f"  {shown + 1}. {sample}"
+
+                    # Skip results that don't fit; smaller ones later may still fit
+                    size = len(entry.encode()) + 1
+                    if shown and used + size > query_budget:
+                        continue
+
+                    used += size
+                    shown += 1
+                    formatted.append(entry)
+                    if isinstance(key, str):
+                        seen_templates.add(key)
+
+                if shown < len(ordered):
+                    formatted.append(f"  ... {len(ordered) - shown} more distinct results omitted")
             formatted.append("")
 
         return "\n".join(formatted)
@@ -709,6 +1504,9 @@ class AnalysisAgent:
         """
         Parse datetime string
 
+        Python 3.11's fromisoformat is implemented in C and accepts the 'Z'
+        suffix and other ISO 8601 forms directly.
+
         Args:
             dt_string: Datetime string
 
@@ -719,7 +1517,7 @@ class AnalysisAgent:
             return None
 
         try:
-            return datetime.fromisoformat(dt_string.replace('Z', '+00:00'))
+            return datetime.fromisoformat(dt_string)
         except Exception:
             return None
 
@@ -728,17 +1526,6 @@ class AnalysisAgent:
         Get default queries when generation fails
 
         Returns:
-            List of default queries
-        """
-        return [
-            {
-                "name": "error_spike",
-                "query": "fields @timestamp, @message | filter @message like /ERROR|Exception|error/ | stats count() by bin(5m)",
-                "purpose": "Detect error spike timing"
-            },
-            {
-                "name": "recent_errors",
-                "query": "fields @timestamp, @message | filter level = 'ERROR' or @message like /ERROR/ | sort @timestamp desc | limit 20",
-                "purpose": "Get recent error messages"
-            }
-        ]
+            List of default queries (shared definitions; don't modify them)
+        """
+        return list(_DEFAULT_QUERIES)
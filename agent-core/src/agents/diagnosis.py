@@ -2,38 +2,391 @@
 Diagnosis Agent - Determines root cause of incidents
 """
 
+import asyncio
 import json
 import logging
-from typing import Dict, Any
+from functools import lru_cache
+from operator import attrgetter
+from typing import Dict, Any, List, Optional, Tuple, Union
 
-from models.schemas import (
+from pydantic import BaseModel, ValidationError, ValidationInfo, field_validator
+
+from ..models.schemas import (
     IncidentEvent,
     AnalysisResult,
     DiagnosisResult
 )
-from prompts.agent_prompts import (
+from ..prompts.agent_prompts import (
     DIAGNOSIS_SYSTEM_PROMPT,
     format_diagnosis_prompt
 )
+from ..utils import json_utils
+from ..utils.bedrock_client import (
+    RequestBodyTemplate,
+    bedrock_executor,
+    check_client_pool,
+    create_bedrock_client,
+    invoke_bedrock_stream
+)
+from ..utils.response_cache import (
+    BEDROCK_RESPONSE_CACHE_SIZE,
+    BEDROCK_RESPONSE_CACHE_TTL_SECONDS,
+    DynamoDBResponseCache,
+    ResponseCache,
+    bedrock_response_cache,
+    cache_key as response_cache_key,
+    diagnosis_shared_cache
+)
 
 logger = logging.getLogger(__name__)
 
+# Output token ceiling; the diagnosis JSON fits well within it, and a lower
+# ceiling bounds decode time when the model runs long. Truncated responses are
+# retried once with the larger budget.
+DIAGNOSIS_MAX_TOKENS = 1024
+DIAGNOSIS_TRUNCATED_MAX_TOKENS = 2500
+
+# Request body with the system prompt pre-serialized (very low temperature for
+# analytical reasoning)
+_REQUEST_BODY = RequestBodyTemplate(DIAGNOSIS_SYSTEM_PROMPT, max_tokens=DIAGNOSIS_MAX_TOKENS, temperature=0.2)
+
+# Parsed diagnoses by prompt, so replayed or repeated alerts skip the Bedrock
+# call and the response parsing (same size/TTL as the response cache)
+_diagnosis_cache = ResponseCache(BEDROCK_RESPONSE_CACHE_SIZE, BEDROCK_RESPONSE_CACHE_TTL_SECONDS)
+
+# Low-confidence results returned when diagnosis or parsing fails; handlers
+# copy them with the error message filled in (the evidence lists are shared
+# between copies and never mutated)
+_FAILED_DIAGNOSIS = DiagnosisResult(
+    root_cause="",
+    confidence=20,
+    category="UNKNOWN",
+    component="unknown",
+    supporting_evidence=[],
+    alternative_causes=[],
+    reasoning=""
+)
+_UNPARSED_DIAGNOSIS = _FAILED_DIAGNOSIS.model_copy(update={'confidence': 30})
+
+# Schema attributes read by the typed-input fast path, fetched in one call each
+_ANALYSIS_ATTRS = attrgetter(
+    'error_patterns', 'key_findings', 'error_count', 'deployment_correlation', 'incident_start', 'summary'
+)
+_INCIDENT_ATTRS = attrgetter('service', 'service_tier', 'metric', 'tags')
+
+
+def _freeze(data: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """
+    Convert prompt data to a hashable form (lists become tuples)
+
+    Args:
+        data: Prompt data dict
+
+    Returns:
+        Tuple of (key, value) pairs in insertion order
+    """
+    return tuple((key, tuple(value) if isinstance(value, list) else value) for key, value in data.items())
+
+
+@lru_cache(maxsize=256)
+def _cached_diagnosis_prompt(
+    incident_items: Tuple[Tuple[str, Any], ...],
+    analysis_items: Tuple[Tuple[str, Any], ...]
+) -> str:
+    """
+    Format the diagnosis prompt from frozen prompt data
+
+    Args:
+        incident_items: Frozen incident_data
+        analysis_items: Frozen analysis_data
+
+    Returns:
+        User prompt
+    """
+    return format_diagnosis_prompt(
+        dict(incident_items),
+        {key: list(value) if isinstance(value, tuple) else value for key, value in analysis_items}
+    )
+
+
+def _format_prompt(incident_data: Dict[str, Any], analysis_data: Dict[str, Any]) -> str:
+    """
+    Format the diagnosis prompt, reusing the result for identical evidence
+
+    Retries and replayed incidents produce the same prompt data, so the
+    templating is cached. Data with unhashable values (e.g. dicts in the
+    error patterns) is formatted without the cache.
+
+    Args:
+        incident_data: Incident fields for the prompt
+        analysis_data: Analysis fields for the prompt
+
+    Returns:
+        User prompt
+    """
+    key = (_freeze(incident_data), _freeze(analysis_data))
+    try:
+        hash(key)
+    except TypeError:
+        return format_diagnosis_prompt(incident_data, analysis_data)
+    return _cached_diagnosis_prompt(*key)
+
+
+class _AnalysisEvidence(BaseModel):
+    """
+    Analysis fields used by the diagnosis prompt, coerced from an
+    AnalysisResult or a plain dict (LangGraph state)
+    """
+    error_patterns: List[Any] = []
+    key_findings: List[Any] = []
+    error_count: Union[int, float] = 0
+    deployment_correlation: str = 'none'
+    incident_start: str = 'unknown'
+    summary: str = 'No analysis summary available'
+
+    @field_validator('error_patterns', 'key_findings', mode='before')
+    @classmethod
+    def _as_list(cls, value: Any) -> List[Any]:
+        if isinstance(value, list):
+            return value
+        return [str(value)] if value else []
+
+    @field_validator('error_count', mode='before')
+    @classmethod
+    def _as_count(cls, value: Any) -> Union[int, float]:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        try:
+            return int(value) if value else 0
+        except (ValueError, TypeError):
+            return 0
+
+    @field_validator('deployment_correlation', 'incident_start', 'summary', mode='before')
+    @classmethod
+    def _as_text(cls, value: Any, info: ValidationInfo) -> str:
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if not value:
+            return cls.model_fields[info.field_name].default
+        return value if isinstance(value, str) else str(value)
+
+    @classmethod
+    def from_any(cls, analysis_result: Any) -> '_AnalysisEvidence':
+        """
+        Normalize an analysis result of any shape
+
+        Args:
+            analysis_result: AnalysisResult, dict, or anything else
+
+        Returns:
+            Normalized evidence (defaults if the input is unusable)
+        """
+        try:
+            return cls.model_validate(analysis_result, from_attributes=True)
+        except ValidationError as e:
+            logger.error(f"analysis_result is unexpected type: {type(analysis_result)}, using defaults: {e}")
+            return cls()
+
+    @classmethod
+    def from_schema(cls, analysis_result: AnalysisResult) -> '_AnalysisEvidence':
+        """
+        Build evidence from an AnalysisResult without validation
+
+        The schema already guarantees the field types, so only the
+        missing-value defaults are applied.
+
+        Args:
+            analysis_result: Result from analysis agent
+
+        Returns:
+            Evidence equivalent to from_any(analysis_result)
+        """
+        (error_patterns, key_findings, error_count, deployment_correlation,
+         incident_start, summary) = _ANALYSIS_ATTRS(analysis_result)
+        return cls.model_construct(
+            error_patterns=error_patterns,
+            key_findings=key_findings,
+            error_count=error_count,
+            deployment_correlation=deployment_correlation or 'none',
+            incident_start=incident_start.isoformat() if incident_start else 'unknown',
+            summary=summary or 'No analysis summary available'
+        )
+
+
+class _IncidentFields(BaseModel):
+    """
+    Incident fields used by the diagnosis prompt, coerced from an
+    IncidentEvent or a plain dict (LangGraph state)
+    """
+    service: str = 'unknown'
+    service_tier: str = 'standard'
+    metric: str = 'unknown'
+    tags: Dict[str, Any] = {}
+
+    @field_validator('service', 'service_tier', 'metric', mode='before')
+    @classmethod
+    def _as_text(cls, value: Any, info: ValidationInfo) -> str:
+        if value is None:
+            return cls.model_fields[info.field_name].default
+        return value if isinstance(value, str) else str(value)
+
+    @field_validator('tags', mode='before')
+    @classmethod
+    def _as_tags(cls, value: Any) -> Dict[str, Any]:
+        return value if isinstance(value, dict) else {}
+
+    @classmethod
+    def from_any(cls, incident: Any) -> '_IncidentFields':
+        """
+        Normalize an incident of any shape
+
+        Args:
+            incident: IncidentEvent, dict, or anything else
+
+        Returns:
+            Normalized incident fields (defaults if the input is unusable)
+        """
+        try:
+            return cls.model_validate(incident, from_attributes=True)
+        except ValidationError as e:
+            logger.error(f"incident is unexpected type: {type(incident)}, using defaults: {e}")
+            return cls()
+
+    @classmethod
+    def from_schema(cls, incident: IncidentEvent) -> '_IncidentFields':
+        """
+        Build incident fields from an IncidentEvent without validation
+
+        Args:
+            incident: Incident event
+
+        Returns:
+            Fields equivalent to from_any(incident)
+        """
+        service, service_tier, metric, tags = _INCIDENT_ATTRS(incident)
+        return cls.model_construct(service=service, service_tier=service_tier, metric=metric, tags=tags)
+
 
 class DiagnosisAgent:
     """
     Diagnosis Agent analyzes evidence to determine root cause
     """
 
-    def __init__(self, bedrock_client, model_id: str = "anthropic.claude-sonnet-4-20250514"):
+    def __init__(
+        self,
+        bedrock_client,
+        model_id: str = "anthropic.claude-sonnet-4-20250514",
+        latency_optimized: bool = True,
+        shared_cache: Optional[DynamoDBResponseCache] = diagnosis_shared_cache,
+        max_tokens: int = DIAGNOSIS_MAX_TOKENS
+    ):
         """
         Initialize Diagnosis Agent
 
         Args:
             bedrock_client: Boto3 Bedrock Runtime client
             model_id: Bedrock model ID to use
+            latency_optimized: Request latency-optimized inference when the
+                model supports it (also disabled by BEDROCK_LATENCY_OPTIMIZED=false)
+            shared_cache: Cache shared with other Lambda instances, consulted
+                after the in-process cache (default: the DIAGNOSIS_CACHE_TABLE
+                table, if configured)
+            max_tokens: Maximum output tokens per diagnosis (raise for models
+                that write long reasoning)
         """
         self.bedrock_client = bedrock_client
         self.model_id = model_id
+        self.latency_optimized = latency_optimized
+        self.shared_cache = shared_cache
+        self.max_tokens = max_tokens
+
+        check_client_pool(bedrock_client)
+
+    @classmethod
+    def build(cls, region_name: Optional[str] = None, **kwargs) -> 'DiagnosisAgent':
+        """
+        Create an agent with its own tuned Bedrock client
+
+        The client comes from create_bedrock_client(), so its connection pool
+        covers BEDROCK_MAX_CONCURRENCY and connections are kept alive between
+        invocations.
+
+        Args:
+            region_name: AWS region (default: from the environment)
+            **kwargs: Other DiagnosisAgent arguments (model_id, latency_optimized,
+                shared_cache, max_tokens)
+
+        Returns:
+            DiagnosisAgent
+        """
+        return cls(create_bedrock_client(region_name=region_name), **kwargs)
+
+    async def diagnose_async(
+        self,
+        incident: IncidentEvent,
+        analysis_result: AnalysisResult
+    ) -> DiagnosisResult:
+        """
+        Diagnose root cause without blocking the event loop
+
+        diagnose() waits on Bedrock synchronously, so it runs on the shared
+        Bedrock thread pool while other coroutines (other investigations,
+        MCP queries) keep making progress.
+
+        Args:
+            incident: Incident event
+            analysis_result: Result from analysis agent (may be AnalysisResult or dict)
+
+        Returns:
+            DiagnosisResult with root cause hypothesis
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(bedrock_executor, self.diagnose, incident, analysis_result)
+
+    async def diagnose_many_async(
+        self,
+        pairs: List[Tuple[IncidentEvent, AnalysisResult]],
+        concurrency: Optional[int] = None
+    ) -> List[DiagnosisResult]:
+        """
+        Diagnose several incidents concurrently without blocking the event loop
+
+        Args:
+            pairs: (incident, analysis result) pairs
+            concurrency: Maximum diagnoses in flight (default: all, still
+                bounded by BEDROCK_MAX_CONCURRENCY)
+
+        Returns:
+            DiagnosisResults in the same order as pairs
+        """
+        semaphore = asyncio.Semaphore(concurrency or max(len(pairs), 1))
+
+        async def diagnose_one(incident, analysis_result) -> DiagnosisResult:
+            async with semaphore:
+                return await self.diagnose_async(incident, analysis_result)
+
+        logger.info(f"Diagnosing {len(pairs)} incidents")
+        return list(await asyncio.gather(*[diagnose_one(*pair) for pair in pairs]))
+
+    def diagnose_many(
+        self,
+        pairs: List[Tuple[IncidentEvent, AnalysisResult]]
+    ) -> List[DiagnosisResult]:
+        """
+        Diagnose several incidents concurrently
+
+        The calls share the Bedrock thread pool, so at most
+        BEDROCK_MAX_CONCURRENCY are in flight. Don't call this from a task
+        already running on that pool.
+
+        Args:
+            pairs: (incident, analysis result) pairs
+
+        Returns:
+            DiagnosisResults in the same order as pairs
+        """
+        logger.info(f"Diagnosing {len(pairs)} incidents")
+        return list(bedrock_executor.map(lambda pair: self.diagnose(*pair), pairs))
 
     def diagnose(
         self,
@@ -51,194 +404,39 @@ class DiagnosisAgent:
             DiagnosisResult with root cause hypothesis
         """
         # Safely get incident_id for logging
-        try:
-            if isinstance(incident, dict):
-                incident_id = incident.get('incident_id', 'unknown')
-            elif hasattr(incident, 'incident_id'):
-                incident_id = incident.incident_id
-            else:
-                incident_id = 'unknown'
-        except Exception as e:
-            logger.warning(f"Error getting incident_id: {e}")
-            incident_id = 'unknown'
-        
+        if isinstance(incident, dict):
+            incident_id = incident.get('incident_id', 'unknown')
+        else:
+            incident_id = getattr(incident, 'incident_id', 'unknown')
+
         logger.info(f"Diagnosing root cause for incident {incident_id}")
         
         # Log types for debugging
-        logger.debug(f"analysis_result type: {type(analysis_result)}")
-        logger.debug(f"incident type: {type(incident)}")
-        if isinstance(analysis_result, dict):
-            logger.debug(f"analysis_result keys: {list(analysis_result.keys()) if analysis_result else 'None'}")
-        if isinstance(incident, dict):
-            logger.debug(f"incident keys: {list(incident.keys()) if incident else 'None'}")
-
-        try:
-            # Handle case where analysis_result might be a dict (from LangGraph state)
-            # First, ensure analysis_result is not a string
-            if isinstance(analysis_result, str):
-                logger.error(f"analysis_result is a string (unexpected): {analysis_result[:200]}")
-                try:
-                    import json
-                    analysis_result = json.loads(analysis_result)
-                except:
-                    analysis_result = {}
-            
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("analysis_result type: %s", type(analysis_result))
+            logger.debug("incident type: %s", type(incident))
             if isinstance(analysis_result, dict):
-                logger.debug("analysis_result is a dict, converting to AnalysisResult-like access")
-                # Convert dict access to safe extraction
-                def get_field(field_name, default=None):
-                    try:
-                        if not isinstance(analysis_result, dict):
-                            logger.error(f"Cannot get field '{field_name}': analysis_result is {type(analysis_result)}")
-                            return default
-                        value = analysis_result.get(field_name, default)
-                        # If value is a dict or list, return as-is, otherwise convert
-                        if isinstance(value, (dict, list, str, int, float, type(None))):
-                            return value
-                        logger.warning(f"Field '{field_name}' has unexpected type {type(value)}, using default")
-                        return default
-                    except TypeError as e:
-                        logger.error(f"TypeError getting field '{field_name}': {e}, analysis_result type: {type(analysis_result)}")
-                        return default
-                    except Exception as e:
-                        logger.error(f"Error getting field '{field_name}': {e}")
-                        return default
-                
-                error_patterns = get_field('error_patterns', [])
-                key_findings = get_field('key_findings', [])
-                error_count = get_field('error_count', 0)
-                deployment_correlation = get_field('deployment_correlation')
-                incident_start = get_field('incident_start')
-                summary = get_field('summary', 'No analysis summary available')
-            elif hasattr(analysis_result, 'error_patterns'):
-                # It's an AnalysisResult object - use attribute access
-                error_patterns = analysis_result.error_patterns
-                key_findings = analysis_result.key_findings
-                error_count = analysis_result.error_count
-                deployment_correlation = analysis_result.deployment_correlation
-                incident_start = analysis_result.incident_start
-                summary = analysis_result.summary
-            else:
-                logger.error(f"analysis_result is unexpected type: {type(analysis_result)}, using defaults")
-                error_patterns = []
-                key_findings = []
-                error_count = 0
-                deployment_correlation = None
-                incident_start = None
-                summary = 'No analysis summary available'
-            
-            # Safely handle incident - could be IncidentEvent, dict, or even string (shouldn't happen but be defensive)
-            if isinstance(incident, str):
-                logger.error(f"incident is a string (unexpected): {incident[:100] if len(incident) > 100 else incident}")
-                # Try to parse as JSON or use defaults
-                try:
-                    import json
-                    incident = json.loads(incident)
-                except:
-                    incident = {}
-            
+                logger.debug("analysis_result keys: %s", list(analysis_result.keys()) if analysis_result else 'None')
             if isinstance(incident, dict):
-                service_name = incident.get('service', 'unknown')
-                service_tier = incident.get('service_tier', 'standard')
-                metric = incident.get('metric', 'unknown')
-                tags = incident.get('tags', {})
-                if not isinstance(tags, dict):
-                    tags = {}
-            elif hasattr(incident, 'service'):
-                # It's an IncidentEvent object
-                service_name = incident.service
-                service_tier = incident.service_tier
-                metric = incident.metric
-                tags = incident.tags if isinstance(incident.tags, dict) else {}
-            else:
-                logger.error(f"incident is unexpected type: {type(incident)}, using defaults")
-                service_name = 'unknown'
-                service_tier = 'standard'
-                metric = 'unknown'
-                tags = {}
-            
-            logger.debug(f"Tags type: {type(tags)}, value: {tags}")
-            
-            # Safely extract and validate analysis result fields
-            if not isinstance(error_patterns, list):
-                logger.warning(f"error_patterns is not a list: {type(error_patterns)}, value: {error_patterns}")
-                error_patterns = [str(error_patterns)] if error_patterns else []
-            
-            if not isinstance(key_findings, list):
-                logger.warning(f"key_findings is not a list: {type(key_findings)}, value: {key_findings}")
-                key_findings = [str(key_findings)] if key_findings else []
-            
-            if not isinstance(error_count, (int, float)):
-                try:
-                    error_count = int(error_count) if error_count else 0
-                except (ValueError, TypeError):
-                    error_count = 0
-            
-            if not isinstance(summary, str):
-                summary = str(summary) if summary else 'No analysis summary available'
-            
-            # Handle deployment_correlation - could be None, string, or dict
-            if deployment_correlation is None:
-                deployment_correlation = 'none'
-            elif isinstance(deployment_correlation, dict):
-                deployment_correlation = str(deployment_correlation)
-            elif not isinstance(deployment_correlation, str):
-                deployment_correlation = str(deployment_correlation) if deployment_correlation else 'none'
-            
-            # Handle incident_start - could be datetime, string, or None
-            if incident_start is None:
-                incident_start_str = 'unknown'
-            elif hasattr(incident_start, 'isoformat'):
-                incident_start_str = incident_start.isoformat()
-            elif isinstance(incident_start, str):
-                incident_start_str = incident_start
-            else:
-                incident_start_str = str(incident_start)
-            
-            incident_data = {
-                'service_name': service_name,
-                'severity': service_tier,  # Using service_tier as severity proxy
-                'metric_name': metric,
-                'log_evidence_summary': summary,  # Include summary in incident_data for prompt
-                'recent_deployments': tags.get('deployment', 'none') if isinstance(tags, dict) else 'none',
-                'service_dependencies': tags.get('dependencies', 'unknown') if isinstance(tags, dict) else 'unknown'
-            }
-            
-            analysis_data = {
-                'error_patterns': error_patterns,
-                'error_count': error_count,
-                'deployment_correlation': deployment_correlation,
-                'incident_start': incident_start_str,
-                'key_findings': key_findings,
-                'summary': summary  # Also include in analysis_data as fallback
-            }
-            
-            logger.debug(f"Prepared incident_data: {list(incident_data.keys())}")
-            logger.debug(f"Prepared analysis_data: {list(analysis_data.keys())}")
+                logger.debug("incident keys: %s", list(incident.keys()) if incident else 'None')
+
+        try:
+            user_prompt = self.build_prompt(incident, analysis_result)
 
-            # Generate prompt with error handling
-            try:
-                user_prompt = format_diagnosis_prompt(incident_data, analysis_data)
-            except TypeError as e:
-                if "string indices must be integers" in str(e):
-                    logger.error(f"TypeError in format_diagnosis_prompt: {e}")
-                    logger.error(f"incident_data type: {type(incident_data)}, keys: {list(incident_data.keys()) if isinstance(incident_data, dict) else 'N/A'}")
-                    logger.error(f"analysis_data type: {type(analysis_data)}, keys: {list(analysis_data.keys()) if isinstance(analysis_data, dict) else 'N/A'}")
-                    # Log the actual values
-                    for key, value in incident_data.items():
-                        logger.error(f"incident_data['{key}'] = {type(value)}: {str(value)[:100]}")
-                    for key, value in analysis_data.items():
-                        logger.error(f"analysis_data['{key}'] = {type(value)}: {str(value)[:100]}")
-                raise
-            
             # Log the prompt for debugging (first 2000 chars)
-            logger.debug(f"Diagnosis prompt (first 2000 chars): {user_prompt[:2000]}")
+            logger.debug("Diagnosis prompt (first 2000 chars): %.2000s", user_prompt)
+
+            cache_key = self._cache_key(user_prompt)
+            cached_diagnosis = _diagnosis_cache.get(cache_key)
+            if cached_diagnosis is not None:
+                logger.info(f"Reusing cached diagnosis for incident {incident_id}")
+                return cached_diagnosis.model_copy(deep=True)
 
             # Call Bedrock
             response = self._call_bedrock(user_prompt)
 
-            # Parse response
-            diagnosis = self._parse_response(response)
+            # Parse response (cached for identical prompts if it parses)
+            diagnosis = self._parse_response(response, cache_key)
 
             logger.info(
                 f"Diagnosis complete: {diagnosis.root_cause} "
@@ -250,233 +448,259 @@ class DiagnosisAgent:
         except Exception as e:
             logger.error(f"Error in diagnosis: {str(e)}", exc_info=True)
             # Return low-confidence diagnosis
-            return DiagnosisResult(
-                root_cause=f"Unable to determine root cause: {str(e)}",
-                confidence=20,
-                category="UNKNOWN",
-                component="unknown",
-                supporting_evidence=[],
-                alternative_causes=[],
-                reasoning=f"Diagnosis failed due to error: {str(e)}"
-            )
+            return _FAILED_DIAGNOSIS.model_copy(update={
+                'root_cause': f"Unable to determine root cause: {str(e)}",
+                'reasoning': f"Diagnosis failed due to error: {str(e)}"
+            })
+
+    def build_prompt(self, incident: IncidentEvent, analysis_result: AnalysisResult) -> str:
+        """
+        Build the diagnosis prompt
+
+        Args:
+            incident: Incident event (may be IncidentEvent or dict)
+            analysis_result: Result from analysis agent (may be AnalysisResult or dict)
+
+        Returns:
+            User prompt with evidence
+        """
+        if isinstance(analysis_result, AnalysisResult) and isinstance(incident, IncidentEvent):
+            # Fast path: the orchestrator passes the schema objects, whose
+            # types need no normalization
+            analysis = _AnalysisEvidence.from_schema(analysis_result)
+            incident_fields = _IncidentFields.from_schema(incident)
+        else:
+            analysis, incident_fields = self._normalize_inputs(incident, analysis_result)
+        tags = incident_fields.tags
+
+        logger.debug("Tags: %s", tags)
+
+        incident_data = {
+            'service_name': incident_fields.service,
+            'severity': incident_fields.service_tier,  # Using service_tier as severity proxy
+            'metric_name': incident_fields.metric,
+            'log_evidence_summary': analysis.summary,  # Include summary in incident_data for prompt
+            'recent_deployments': tags.get('deployment', 'none'),
+            'service_dependencies': tags.get('dependencies', 'unknown')
+        }
+
+        # summary is also included in analysis_data as fallback
+        analysis_data = analysis.model_dump()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Prepared incident_data: %s", list(incident_data))
+            logger.debug("Prepared analysis_data: %s", list(analysis_data))
+
+        # Generate prompt with error handling (cached for identical evidence)
+        try:
+            return _format_prompt(incident_data, analysis_data)
+        except TypeError as e:
+            if "string indices must be integers" in str(e):
+                logger.error(f"TypeError in format_diagnosis_prompt: {e}")
+                logger.error(f"incident_data type: {type(incident_data)}, keys: {list(incident_data.keys()) if isinstance(incident_data, dict) else 'N/A'}")
+                logger.error(f"analysis_data type: {type(analysis_data)}, keys: {list(analysis_data.keys()) if isinstance(analysis_data, dict) else 'N/A'}")
+                # Log the actual values
+                for key, value in incident_data.items():
+                    logger.error(f"incident_data['{key}'] = {type(value)}: {str(value)[:100]}")
+                for key, value in analysis_data.items():
+                    logger.error(f"analysis_data['{key}'] = {type(value)}: {str(value)[:100]}")
+            raise
+
+    def _normalize_inputs(
+        self,
+        incident: Any,
+        analysis_result: Any
+    ) -> Tuple[_AnalysisEvidence, _IncidentFields]:
+        """
+        Normalize inputs that aren't the expected schema types
+
+        Args:
+            incident: Incident as a dict, JSON string, or other object
+            analysis_result: Analysis result as a dict, JSON string, or other object
+
+        Returns:
+            (analysis evidence, incident fields)
+        """
+        # Handle case where analysis_result or incident arrive as JSON
+        # strings (shouldn't happen but be defensive)
+        if isinstance(analysis_result, str):
+            logger.error(f"analysis_result is a string (unexpected): {analysis_result[:200]}")
+            try:
+                analysis_result = json.loads(analysis_result)
+            except ValueError:
+                analysis_result = {}
+
+        if isinstance(incident, str):
+            logger.error(f"incident is a string (unexpected): {incident[:100]}")
+            try:
+                incident = json.loads(incident)
+            except ValueError:
+                incident = {}
+
+        # Normalize both (AnalysisResult/IncidentEvent-like objects or dicts
+        # from LangGraph state) to the fields the prompt needs in one validation
+        return _AnalysisEvidence.from_any(analysis_result), _IncidentFields.from_any(incident)
+
+    def _cache_key(self, user_prompt: str) -> str:
+        """
+        Build the cache key for a diagnosis prompt
+
+        Args:
+            user_prompt: User prompt with evidence
+
+        Returns:
+            Key covering everything that determines the response
+        """
+        return response_cache_key(
+            self.model_id, _REQUEST_BODY.temperature, self.max_tokens, DIAGNOSIS_SYSTEM_PROMPT, user_prompt
+        )
 
-    def _call_bedrock(self, user_prompt: str) -> str:
+    def _call_bedrock(self, user_prompt: str, cache: bool = True) -> str:
         """
         Call Bedrock Claude
 
+        Responses are cached (see utils.response_cache), so a repeated alert
+        with identical evidence doesn't go back to Bedrock, even when another
+        Lambda instance diagnosed it (shared_cache).
+
         Args:
             user_prompt: User prompt with evidence
+            cache: Use a cached response if available (False forces a refresh)
 
         Returns:
             Response text
         """
+        cache_key = self._cache_key(user_prompt)
+
+        if cache:
+            cached_response = bedrock_response_cache.get(cache_key)
+            if cached_response is not None:
+                logger.debug("Bedrock response cache hit")
+                return cached_response
+
+            if self.shared_cache is not None:
+                cached_response = self.shared_cache.get(cache_key)
+                if cached_response is not None:
+                    logger.info("Reusing diagnosis response from the shared cache")
+                    bedrock_response_cache.put(cache_key, cached_response)
+                    return cached_response
+
         try:
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2500,
-                "temperature": 0.2,  # Very low temp for analytical reasoning
-                "system": DIAGNOSIS_SYSTEM_PROMPT,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": user_prompt
-                    }
-                ]
-            }
-
-            # Invoke model with retry logic for throttling
-            from utils.bedrock_client import invoke_bedrock_with_retry
-            
-            response = invoke_bedrock_with_retry(
-                bedrock_client=self.bedrock_client,
-                model_id=self.model_id,
-                request_body=request_body,
-                max_retries=5,
-                initial_delay=2.0,
-                max_delay=30.0
-            )
+            budgets = (self.max_tokens,)
+            if self.max_tokens < DIAGNOSIS_TRUNCATED_MAX_TOKENS:
+                budgets += (DIAGNOSIS_TRUNCATED_MAX_TOKENS,)
 
-            response_body = json.loads(response['body'].read())
-            return response_body['content'][0]['text']
+            for max_tokens in budgets:
+                request_body = _REQUEST_BODY.render(user_prompt, max_tokens=max_tokens)
+
+                # Stream the response with retry logic for throttling; the
+                # diagnosis is a JSON object, so stop reading once it's complete
+                response_text, stop_reason = invoke_bedrock_stream(
+                    bedrock_client=self.bedrock_client,
+                    model_id=self.model_id,
+                    request_body=request_body,
+                    stop_after_json=True,
+                    max_retries=5,
+                    initial_delay=2.0,
+                    max_delay=30.0,
+                    latency_optimized=self.latency_optimized
+                )
+
+                if stop_reason != 'max_tokens':
+                    break
+                logger.warning(f"Diagnosis response truncated at {max_tokens} tokens")
+            else:
+                # Still truncated; don't cache it so the next attempt asks again
+                return response_text
+
+            # Only cache responses that parse, so a garbled answer isn't
+            # served to every instance for the shared cache's TTL
+            try:
+                json_utils.extract_json(response_text)
+            except ValueError:
+                logger.warning("Diagnosis response is not valid JSON, not caching it")
+                return response_text
+
+            bedrock_response_cache.put(cache_key, response_text)
+            if self.shared_cache is not None:
+                self.shared_cache.put(cache_key, response_text)
+            return response_text
 
         except Exception as e:
             logger.error(f"Bedrock invocation failed: {str(e)}", exc_info=True)
             raise
 
-    def _parse_response(self, response_text: str) -> DiagnosisResult:
+    def _parse_response(self, response_text: str, cache_key: Optional[str] = None) -> DiagnosisResult:
         """
         Parse Claude's diagnosis response
 
         Args:
             response_text: Raw response from Claude
+            cache_key: Cache the result under this key if it parses
 
         Returns:
             Parsed DiagnosisResult
         """
         try:
             # Log raw response for debugging (first 500 chars)
-            logger.debug(f"Raw diagnosis response (first 500 chars): {response_text[:500]}")
-            
-            # Try multiple extraction strategies
-            json_text = None
+            logger.debug("Raw diagnosis response (first 500 chars): %.500s", response_text)
             
-            # Strategy 1: Look for ```json code block
-            if "```json" in response_text:
-                start = response_text.index("```json") + 7
-                end_pos = response_text.find("```", start)
-                if end_pos > start:
-                    json_text = response_text[start:end_pos].strip()
-                    logger.debug("Extracted JSON from ```json block")
-            
-            # Strategy 2: Look for JSON object (first { to last })
-            if not json_text and "{" in response_text:
-                start = response_text.index("{")
-                # Find the matching closing brace
-                brace_count = 0
-                end = start
-                for i in range(start, len(response_text)):
-                    if response_text[i] == '{':
-                        brace_count += 1
-                    elif response_text[i] == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end = i + 1
-                            break
-                if end > start:
-                    json_text = response_text[start:end]
-                    logger.debug("Extracted JSON from { } braces")
-            
-            # Strategy 3: Try to find JSON-like structure with regex fallback
-            if not json_text:
-                # Try to extract anything that looks like JSON
-                import re
-                json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', response_text, re.DOTALL)
-                if json_match:
-                    json_text = json_match.group(0)
-                    logger.debug("Extracted JSON using regex fallback")
-            
-            # Strategy 4: Use entire response as JSON (last resort)
-            if not json_text:
-                json_text = response_text.strip()
-                logger.debug("Using entire response as JSON (last resort)")
-            
-            # Parse JSON
-            if json_text:
-                # Clean up common issues
-                json_text = json_text.strip()
-                # Remove any leading/trailing whitespace or markdown
-                json_text = json_text.lstrip('`').rstrip('`')
-                
-                # Clean and repair JSON before parsing
-                import re
-                import json as json_module
-                
-                logger.debug(f"Raw diagnosis JSON (first 1000 chars): {json_text[:1000]}")
-                
-                # Try parsing as-is first
-                try:
-                    data = json_module.loads(json_text)
-                except json_module.JSONDecodeError as parse_error:
-                    logger.warning(f"Initial JSON parse failed: {parse_error}, attempting repair...")
-                    
-                    # Repair JSON by escaping control characters in string values
-                    repaired_json = ""
-                    i = 0
-                    in_string = False
-                    escape_next = False
-                    
-                    while i < len(json_text):
-                        char = json_text[i]
-                        
-                        if escape_next:
-                            repaired_json += char
-                            escape_next = False
-                        elif char == '\\':
-                            repaired_json += char
-                            escape_next = True
-                        elif char == '"' and not escape_next:
-                            in_string = not in_string
-                            repaired_json += char
-                        elif in_string:
-                            # Inside string - escape control characters
-                            if char in ['\n', '\r', '\t', '\b', '\f']:
-                                repaired_json += {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}[char]
-                            elif ord(char) < 32 or ord(char) == 127:
-                                repaired_json += ' '  # Replace with space
-                            else:
-                                repaired_json += char
-                        else:
-                            # Outside string - remove control chars
-                            if ord(char) >= 32 or char in ['\n', '\r', '\t']:
-                                repaired_json += char
-                        i += 1
-                    
-                    json_text = repaired_json
-                    logger.debug(f"Repaired diagnosis JSON (first 1000 chars): {json_text[:1000]}")
-                    
-                    try:
-                        data = json_module.loads(json_text)
-                    except json_module.JSONDecodeError as second_error:
-                        error_pos = getattr(second_error, 'pos', None)
-                        logger.error(f"JSON parse still failing after repair: {second_error}")
-                        if error_pos:
-                            start = max(0, error_pos - 200)
-                            end = min(len(json_text), error_pos + 200)
-                            logger.error(f"Problematic section around position {error_pos}:")
-                            logger.error(f"{json_text[start:end]}")
-                        raise
-                
-                # Validate required fields
-                if not isinstance(data, dict):
-                    raise ValueError("Parsed data is not a dictionary")
-                
-                # Ensure category and component are strings (not None)
-                category = data.get('category')
-                if not category or not isinstance(category, str):
-                    category = 'UNKNOWN'
-                
-                component = data.get('component')
-                if not component or not isinstance(component, str):
-                    component = 'unknown'
-                
-                return DiagnosisResult(
-                    root_cause=data.get('root_cause', 'Unknown'),
-                    confidence=int(data.get('confidence', 50)),
-                    category=category,
-                    component=component,
-                    supporting_evidence=data.get('supporting_evidence', []),
-                    alternative_causes=data.get('alternative_causes', []),
-                    reasoning=data.get('reasoning', 'No reasoning provided')
-                )
-            else:
-                raise ValueError("Could not extract JSON from response")
+            diagnosis = self.parse_data(json_utils.extract_json(response_text))
+            if cache_key is not None:
+                _diagnosis_cache.put(cache_key, diagnosis.model_copy(deep=True))
+            return diagnosis
 
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {str(e)}", exc_info=True)
             logger.error(f"Failed to parse JSON. Response text (first 1000 chars): {response_text[:1000]}")
-            logger.error(f"Attempted JSON text (first 500 chars): {json_text[:500] if json_text else 'None'}")
             
             # Return low-confidence result
-            return DiagnosisResult(
-                root_cause="Failed to parse diagnosis response: Invalid JSON format",
-                confidence=30,
-                category="UNKNOWN",
-                component="unknown",
-                supporting_evidence=[],
-                alternative_causes=[],
-                reasoning=f"JSON parse error: {str(e)}. Response may contain extra text or malformed JSON."
-            )
+            return _UNPARSED_DIAGNOSIS.model_copy(update={
+                'root_cause': "Failed to parse diagnosis response: Invalid JSON format",
+                'reasoning': f"JSON parse error: {str(e)}. Response may contain extra text or malformed JSON."
+            })
         except Exception as e:
             logger.error(f"Failed to parse diagnosis response: {str(e)}", exc_info=True)
             logger.error(f"Response text (first 1000 chars): {response_text[:1000]}")
             
             # Return low-confidence result
-            return DiagnosisResult(
-                root_cause=f"Failed to parse diagnosis response: {str(e)}",
-                confidence=30,
-                category="UNKNOWN",
-                component="unknown",
-                supporting_evidence=[],
-                alternative_causes=[],
-                reasoning=f"Parse error: {str(e)}"
-            )
+            return _UNPARSED_DIAGNOSIS.model_copy(update={
+                'root_cause': f"Failed to parse diagnosis response: {str(e)}",
+                'reasoning': f"Parse error: {str(e)}"
+            })
+
+    def parse_data(self, data: Any) -> DiagnosisResult:
+        """
+        Build a DiagnosisResult from the diagnosis JSON
+
+        Args:
+            data: Parsed diagnosis object
+
+        Returns:
+            DiagnosisResult
+
+        Raises:
+            ValueError: If data isn't a diagnosis object
+        """
+        # Validate required fields
+        if not isinstance(data, dict):
+            raise ValueError("Parsed data is not a dictionary")
+
+        # Ensure category and component are strings (not None)
+        category = data.get('category')
+        if not category or not isinstance(category, str):
+            category = 'UNKNOWN'
+
+        component = data.get('component')
+        if not component or not isinstance(component, str):
+            component = 'unknown'
+
+        return DiagnosisResult(
+            root_cause=data.get('root_cause', 'Unknown'),
+            confidence=int(data.get('confidence', 50)),
+            category=category,
+            component=component,
+            supporting_evidence=data.get('supporting_evidence', []),
+            alternative_causes=data.get('alternative_causes', []),
+            reasoning=data.get('reasoning', 'No reasoning provided')
+        )
@@ -2,11 +2,14 @@
 Remediation Agent - Proposes safe fixes for incidents
 """
 
-import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional, Tuple
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
-from models.schemas import (
+from ..models.schemas import (
     IncidentEvent,
     DiagnosisResult,
     RemediationResult,
@@ -14,13 +17,196 @@ from models.schemas import (
     RiskLevel,
     ExecutionType
 )
-from prompts.agent_prompts import (
+from ..prompts.agent_prompts import (
+    DIAGNOSIS_REMEDIATION_SYSTEM_PROMPT,
     REMEDIATION_SYSTEM_PROMPT,
+    format_diagnosis_remediation_prompt,
     format_remediation_prompt
 )
+from ..utils import json_utils
+from ..utils.bedrock_client import RequestBodyTemplate, bedrock_executor, invoke_bedrock_stream
+from ..utils.micro_batcher import MicroBatcher
+from ..utils.response_cache import (
+    BEDROCK_RESPONSE_CACHE_SIZE,
+    BEDROCK_RESPONSE_CACHE_TTL_SECONDS,
+    ResponseCache,
+    bedrock_response_cache,
+    cache_key as response_cache_key,
+    normalize_text
+)
 
 logger = logging.getLogger(__name__)
 
+# Output token budget per remediation (batched calls get one per incident); a
+# remediation JSON is usually well under it. Truncated responses are retried
+# once with the larger budget.
+REMEDIATION_MAX_TOKENS = 1200
+REMEDIATION_TRUNCATED_MAX_TOKENS = 3000
+
+# Request body with the system prompt pre-serialized and marked for prompt
+# caching (low temperature for safety-critical decisions)
+_REQUEST_BODY = RequestBodyTemplate(
+    REMEDIATION_SYSTEM_PROMPT, max_tokens=REMEDIATION_MAX_TOKENS, temperature=0.2, cache_system=True
+)
+
+# Output token budget for a diagnosis and its remediation in one response (the
+# diagnosis budget plus one remediation). Truncated responses fall back to
+# separate calls.
+REMEDIATION_CHAIN_MAX_TOKENS = 2200
+
+# Request body for diagnosis and remediation in one call
+_CHAIN_REQUEST_BODY = RequestBodyTemplate(
+    DIAGNOSIS_REMEDIATION_SYSTEM_PROMPT, max_tokens=REMEDIATION_CHAIN_MAX_TOKENS, temperature=0.2,
+    cache_system=True
+)
+
+# Remediation calls in flight at once per event loop; match it to the
+# account's Bedrock quota for the model so bursts don't end in throttling retries
+BEDROCK_TPS = int(os.environ.get('BEDROCK_TPS', '10'))
+
+# Diagnoses below this confidence (%) are escalated without asking the model
+# for a remediation; there's no reliable root cause to act on
+REMEDIATION_MIN_CONFIDENCE = 30
+
+# POC service-to-repo mapping (only services with repos)
+# Format: {org}/poc-{service-name}
+_POC_SERVICES = {
+    "payment-service": "poc-payment-service",
+    "rating-service": "poc-rating-service",
+    "order-service": "poc-order-service",
+}
+
+# Diagnosis categories whose fix is a code or config change. DEPENDENCY and
+# CONFIGURATION count too (e.g., payment gateway timeout config needs code changes)
+_CODE_FIX_CATEGORIES = frozenset({
+    'BUG', 'LOGIC_ERROR', 'HANDLING', 'TIMEOUT', 'ERROR_HANDLING', 'CODE',
+    'DEPENDENCY', 'CONFIGURATION'
+})
+
+# Action types (matched as substrings of the proposed action type) that mean a
+# code or config change, and safe operations that may be executed automatically
+_CODE_FIX_ACTION_RE = re.compile('config_change|code_fix|fix|update_config|modify_config')
+_AUTO_EXECUTE_ACTION_RE = re.compile(
+    'restart|scale|clear_cache|reset_connections|enable_feature_flag|disable_feature'
+)
+
+# Parsed remediations by incident fingerprint (see RemediationAgent._fingerprint),
+# so a flapping service's repeated incidents skip the Bedrock call and the
+# response parsing even when counts or evidence wording differ (same size/TTL
+# as the response cache). Execution categorization still runs per incident.
+_remediation_cache = ResponseCache(BEDROCK_RESPONSE_CACHE_SIZE, BEDROCK_RESPONSE_CACHE_TTL_SECONDS)
+
+
+def _as_bool(value: Any, default: bool) -> bool:
+    """
+    Read a JSON boolean strictly
+
+    Args:
+        value: Value from the response JSON (a bool, or "true"/"false")
+        default: Value used when it is missing
+
+    Returns:
+        The boolean; anything unrecognized counts as False, since flags like
+        "reversible" gate automatic execution
+    """
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return isinstance(value, str) and value.strip().lower() == 'true'
+
+
+def _construct_action(action_data: Dict[str, Any], default_description: str) -> RemediationAction:
+    """
+    Build a RemediationAction from Claude's JSON without pydantic validation
+
+    Every field is converted explicitly to its schema type (missing or null
+    strings get defaults, the flag is read strictly); a malformed action
+    raises and the caller falls back to a validated escalation.
+
+    Args:
+        action_data: Action object from the response JSON
+        default_description: Description used when the action has none
+
+    Returns:
+        RemediationAction
+    """
+    steps = action_data.get('steps')
+    rollback_plan = action_data.get('rollback_plan')
+    return RemediationAction.model_construct(
+        action_type=str(action_data.get('action_type') or 'monitor'),
+        description=str(action_data.get('description') or default_description),
+        steps=[str(step) for step in steps] if isinstance(steps, list) else [],
+        estimated_time_minutes=int(action_data.get('estimated_time_minutes', 5)),
+        risk_level=RiskLevel(action_data.get('risk_level', 'MEDIUM')),
+        reversible=_as_bool(action_data.get('reversible'), True),
+        rollback_plan=str(rollback_plan) if rollback_plan is not None else None
+    )
+
+
+@lru_cache(maxsize=64)
+def _repo_for_service(service_name: str) -> Optional[str]:
+    """
+    Look up a service's GitHub repository (environment read once per service)
+
+    Args:
+        service_name: Service name (e.g., "payment-service")
+
+    Returns:
+        Repository path (org/repo) or None if not mapped
+    """
+    # Service not in POC repos
+    repo_name = _POC_SERVICES.get(service_name)
+    if repo_name is None:
+        return None
+
+    # Get GitHub org/username from environment (default to placeholder), and
+    # allow an override for the specific service
+    github_org = os.environ.get("GITHUB_ORG", "your-org")
+    env_key = f"{service_name.upper().replace('-', '_')}_SERVICE_REPO"
+    return os.environ.get(env_key, f"{github_org}/{repo_name}")
+
+
+class _RemediationBatcher(MicroBatcher):
+    """
+    Packs remediation prompts submitted close together into one Bedrock call
+    asking for one remediation per incident (see MicroBatcher). The output
+    budget grows with the batch.
+    """
+
+    name = "remediation"
+
+    async def _call_batch(self, prompt: str, incidents: int) -> str:
+        """
+        Send the combined prompt with an output budget for every incident
+
+        Args:
+            prompt: Combined prompt
+            incidents: Number of incidents it covers
+
+        Returns:
+            Response text
+        """
+        return await self._call(prompt, incidents=incidents)
+
+    def _build_batch_prompt(self, incidents: int, sections: str) -> str:
+        """
+        Build the combined remediation prompt
+
+        Args:
+            incidents: Number of incidents
+            sections: The per-incident prompts
+
+        Returns:
+            Prompt asking for one remediation per incident
+        """
+        return (
+            f"Propose a remediation for each of the {incidents} independent incidents below, "
+            f"exactly as you would for a single incident. Respond with one JSON object: "
+            f'{{"results": [{{...remediation...}}, ...]}} with one element per incident, '
+            f"in the same order.\n\n{sections}"
+        )
+
 
 class RemediationAgent:
     """
@@ -38,6 +224,71 @@ class RemediationAgent:
         self.bedrock_client = bedrock_client
         self.model_id = model_id
 
+        # Batches remediation calls across concurrent investigations (per loop)
+        self._batcher: Optional[_RemediationBatcher] = None
+
+        # Caps concurrent Bedrock calls at BEDROCK_TPS (created per loop)
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def propose_remediation_async(
+        self,
+        incident: IncidentEvent,
+        diagnosis: DiagnosisResult
+    ) -> RemediationResult:
+        """
+        Propose remediation without blocking the event loop
+
+        Bedrock calls run on the shared Bedrock thread pool, and remediations
+        requested by concurrent investigations share one call through the
+        batcher.
+
+        Args:
+            incident: Incident event
+            diagnosis: Diagnosis result with root cause
+
+        Returns:
+            RemediationResult with recommended actions
+        """
+        logger.info(
+            "Proposing remediation for incident %s (root cause: %s)",
+            incident.incident_id, diagnosis.root_cause
+        )
+
+        try:
+            skip_reason = self._skip_reason(incident, diagnosis)
+            if skip_reason:
+                return self._escalate_without_model(incident, diagnosis, skip_reason)
+
+            remediation = self._get_cached(incident, diagnosis)
+            if remediation is None:
+                user_prompt = self._build_prompt(incident, diagnosis)
+                response = await self._get_batcher().submit(user_prompt)
+                remediation = self._parse_and_cache(incident, diagnosis, response)
+            return self._finalize(remediation, incident, diagnosis)
+
+        except Exception as e:
+            return self._handle_error(incident, diagnosis, e)
+
+    async def propose_many_async(
+        self,
+        pairs: List[Tuple[IncidentEvent, DiagnosisResult]]
+    ) -> List[RemediationResult]:
+        """
+        Propose remediations for several incidents concurrently
+
+        Submitted together, the incidents are packed into shared Bedrock
+        calls (see _RemediationBatcher).
+
+        Args:
+            pairs: (incident, diagnosis) pairs
+
+        Returns:
+            RemediationResults in the same order as pairs
+        """
+        logger.info("Proposing remediations for %d incidents", len(pairs))
+        return list(await asyncio.gather(*[self.propose_remediation_async(*pair) for pair in pairs]))
+
     def propose_remediation(
         self,
         incident: IncidentEvent,
@@ -54,175 +305,459 @@ class RemediationAgent:
             RemediationResult with recommended actions
         """
         logger.info(
-            f"Proposing remediation for incident {incident.incident_id} "
-            f"(root cause: {diagnosis.root_cause})"
+            "Proposing remediation for incident %s (root cause: %s)",
+            incident.incident_id, diagnosis.root_cause
         )
 
         try:
-            # Prepare remediation data
-            remediation_data = {
-                'root_cause': diagnosis.root_cause,
-                'confidence': diagnosis.confidence,
-                'category': diagnosis.category,
-                'component': diagnosis.component,
-                'service_name': incident.service,
-                'severity': incident.service_tier,
-                'current_state': 'degraded',
-                'supporting_evidence': diagnosis.supporting_evidence
-            }
-
-            # Generate prompt
-            user_prompt = format_remediation_prompt(remediation_data, incident.dict())
-
-            # Call Bedrock
-            response = self._call_bedrock(user_prompt)
-
-            # Parse response
-            remediation = self._parse_response(response)
-
-            # Categorize execution type
-            execution_type, metadata = self._categorize_execution(
-                remediation.recommended_action,
-                diagnosis,
-                incident
-            )
-            remediation.execution_type = execution_type
-            remediation.execution_metadata = metadata
-
-            logger.info(
-                f"Remediation proposed: {remediation.recommended_action.action_type} "
-                f"(risk: {remediation.recommended_action.risk_level.value}, "
-                f"execution: {execution_type.value}, "
-                f"requires_approval: {remediation.requires_approval})"
+            skip_reason = self._skip_reason(incident, diagnosis)
+            if skip_reason:
+                return self._escalate_without_model(incident, diagnosis, skip_reason)
+
+            remediation = self._get_cached(incident, diagnosis)
+            if remediation is None:
+                user_prompt = self._build_prompt(incident, diagnosis)
+                # Call Bedrock
+                response = self._call_bedrock(user_prompt)
+                remediation = self._parse_and_cache(incident, diagnosis, response)
+            return self._finalize(remediation, incident, diagnosis)
+
+        except Exception as e:
+            return self._handle_error(incident, diagnosis, e)
+
+    async def propose_from_prompt_chain_async(
+        self,
+        incident: IncidentEvent,
+        diagnosis_prompt: str,
+        parse_diagnosis: Callable[[Any], DiagnosisResult]
+    ) -> Optional[Tuple[DiagnosisResult, RemediationResult]]:
+        """
+        Diagnose and propose remediation in one call without blocking the event loop
+
+        Args:
+            incident: Incident event
+            diagnosis_prompt: Diagnosis prompt (see DiagnosisAgent.build_prompt)
+            parse_diagnosis: Builds the DiagnosisResult from the diagnosis JSON
+                (see DiagnosisAgent.parse_data)
+
+        Returns:
+            (diagnosis, remediation), or None to fall back to separate calls
+        """
+        loop = asyncio.get_running_loop()
+        async with self._get_semaphore():
+            return await loop.run_in_executor(
+                bedrock_executor, self.propose_from_prompt_chain, incident, diagnosis_prompt, parse_diagnosis
             )
 
-            return remediation
+    def propose_from_prompt_chain(
+        self,
+        incident: IncidentEvent,
+        diagnosis_prompt: str,
+        parse_diagnosis: Callable[[Any], DiagnosisResult]
+    ) -> Optional[Tuple[DiagnosisResult, RemediationResult]]:
+        """
+        Diagnose and propose remediation in one Bedrock call
+
+        The diagnosis prompt is extended to ask for the remediation of the
+        root cause in the same response, saving the second round-trip of
+        diagnose() followed by propose_remediation(). If the response is
+        truncated or either part can't be parsed, None is returned and the
+        caller falls back to the two calls.
+
+        Args:
+            incident: Incident event
+            diagnosis_prompt: Diagnosis prompt (see DiagnosisAgent.build_prompt)
+            parse_diagnosis: Builds the DiagnosisResult from the diagnosis JSON
+                (see DiagnosisAgent.parse_data)
+
+        Returns:
+            (diagnosis, remediation), or None to fall back to separate calls
+        """
+        logger.info("Diagnosing and proposing remediation for incident %s in one call", incident.incident_id)
+
+        user_prompt = format_diagnosis_remediation_prompt(diagnosis_prompt)
+        cache_key = response_cache_key(self.model_id, DIAGNOSIS_REMEDIATION_SYSTEM_PROMPT, user_prompt)
+
+        try:
+            response_text = bedrock_response_cache.get(cache_key)
+            cached = response_text is not None
+            if not cached:
+                response_text, stop_reason = invoke_bedrock_stream(
+                    bedrock_client=self.bedrock_client,
+                    model_id=self.model_id,
+                    request_body=_CHAIN_REQUEST_BODY.render(user_prompt, model_id=self.model_id),
+                    stop_after_json=True,
+                    max_retries=5,
+                    initial_delay=2.0,
+                    max_delay=30.0
+                )
+                if stop_reason == 'max_tokens':
+                    logger.warning(
+                        f"Combined diagnosis and remediation truncated at "
+                        f"{REMEDIATION_CHAIN_MAX_TOKENS} tokens; falling back to separate calls"
+                    )
+                    return None
+
+            data = json_utils.extract_json(response_text)
+            diagnosis = parse_diagnosis(data['diagnosis'])
+            remediation = self._result_from_data(data['remediation'])
+
+            # Cached only once both parts parse, so retries of a garbled
+            # reply go back to Bedrock
+            if not cached:
+                bedrock_response_cache.put(cache_key, response_text)
 
         except Exception as e:
-            logger.error(f"Error in remediation: {str(e)}", exc_info=True)
-            # Return safe fallback action
-            fallback = self._get_fallback_remediation(incident, diagnosis, str(e))
-            # Set execution type for fallback
-            fallback.execution_type = ExecutionType.ESCALATE
-            fallback.execution_metadata = {"reason": f"Agent error: {str(e)}"}
-            return fallback
+            logger.warning(f"Combined diagnosis and remediation failed, falling back to separate calls: {e}")
+            return None
+
+        skip_reason = self._skip_reason(incident, diagnosis)
+        if skip_reason:
+            return diagnosis, self._escalate_without_model(incident, diagnosis, skip_reason)
+        return diagnosis, self._finalize(remediation, incident, diagnosis)
+
+    def _skip_reason(self, incident: IncidentEvent, diagnosis: DiagnosisResult) -> Optional[str]:
+        """
+        Check whether the incident would be escalated whatever the model proposed
+
+        Args:
+            incident: Incident event
+            diagnosis: Diagnosis result with root cause
+
+        Returns:
+            Why the Bedrock call can be skipped, or None to call it
+        """
+        if diagnosis.confidence < REMEDIATION_MIN_CONFIDENCE:
+            return (
+                f"Diagnosis confidence {diagnosis.confidence}% is below "
+                f"{REMEDIATION_MIN_CONFIDENCE}%; root cause needs human analysis"
+            )
+
+        component = (diagnosis.component or '').strip().lower()
+        if incident.service == 'unknown-service' and component in ('', 'unknown'):
+            return "Neither the incident nor the diagnosis identifies the affected service"
+
+        return None
+
+    def _escalate_without_model(
+        self,
+        incident: IncidentEvent,
+        diagnosis: DiagnosisResult,
+        reason: str
+    ) -> RemediationResult:
+        """
+        Build the escalation result for an incident skipped by _skip_reason
+
+        Args:
+            incident: Incident event
+            diagnosis: Diagnosis result
+            reason: Why no remediation was requested
+
+        Returns:
+            Safe fallback RemediationResult (escalated)
+        """
+        logger.info("Escalating incident %s without a Bedrock call: %s", incident.incident_id, reason)
+        fallback = self._get_fallback_remediation(incident, diagnosis, reason)
+        fallback.recommended_action.description = (
+            "No automated remediation proposed. Monitor service and escalate if needed."
+        )
+        fallback.approval_reason = f"Automated remediation skipped: {reason}"
+        fallback.execution_type = ExecutionType.ESCALATE
+        fallback.execution_metadata = {"reason": reason}
+        return fallback
+
+    def _build_prompt(self, incident: IncidentEvent, diagnosis: DiagnosisResult) -> str:
+        """
+        Build the remediation prompt
+
+        Args:
+            incident: Incident event
+            diagnosis: Diagnosis result with root cause
+
+        Returns:
+            User prompt
+        """
+        # Prepare remediation data
+        remediation_data = {
+            'root_cause': diagnosis.root_cause,
+            'confidence': diagnosis.confidence,
+            'category': diagnosis.category,
+            'component': diagnosis.component,
+            'service_name': incident.service,
+            'severity': incident.service_tier,
+            'current_state': 'degraded',
+            'supporting_evidence': diagnosis.supporting_evidence
+        }
+
+        # Generate prompt (the prompt reads only the service from the
+        # incident; dumping the whole model would deep-copy raw_event)
+        return format_remediation_prompt(remediation_data, {'service': incident.service})
+
+    def _fingerprint(self, incident: IncidentEvent, diagnosis: DiagnosisResult) -> str:
+        """
+        Build the remediation cache key for an incident
+
+        Incidents with the same normalized root cause, category, component and
+        service get the same remediation, whatever their counts, confidence
+        or evidence.
+
+        Args:
+            incident: Incident event
+            diagnosis: Diagnosis result with root cause
+
+        Returns:
+            Cache key
+        """
+        return response_cache_key(
+            self.model_id,
+            normalize_text(diagnosis.root_cause),
+            normalize_text(diagnosis.category),
+            normalize_text(diagnosis.component),
+            incident.service
+        )
+
+    def _get_cached(self, incident: IncidentEvent, diagnosis: DiagnosisResult) -> Optional[RemediationResult]:
+        """
+        Get a copy of the cached remediation for an equivalent incident
+
+        Args:
+            incident: Incident event
+            diagnosis: Diagnosis result with root cause
+
+        Returns:
+            RemediationResult, or None if not cached
+        """
+        remediation = _remediation_cache.get(self._fingerprint(incident, diagnosis))
+        if remediation is None:
+            return None
+        logger.info("Reusing cached remediation for incident %s", incident.incident_id)
+        return remediation.model_copy(deep=True)
+
+    def _parse_and_cache(
+        self,
+        incident: IncidentEvent,
+        diagnosis: DiagnosisResult,
+        response: str
+    ) -> RemediationResult:
+        """
+        Parse a response and cache the result for equivalent incidents
+
+        Only responses that parse are cached; the parse-failure escalation
+        isn't reused for other incidents.
+
+        Args:
+            incident: Incident event
+            diagnosis: Diagnosis result the response answers
+            response: Response text
 
-    def _call_bedrock(self, user_prompt: str) -> str:
+        Returns:
+            Parsed RemediationResult
+        """
+        return self._parse_response(response, self._fingerprint(incident, diagnosis))
+
+    def _finalize(
+        self,
+        remediation: RemediationResult,
+        incident: IncidentEvent,
+        diagnosis: DiagnosisResult
+    ) -> RemediationResult:
+        """
+        Categorize how a proposed remediation is executed
+
+        Args:
+            remediation: Parsed remediation
+            incident: Incident event
+            diagnosis: Diagnosis result
+
+        Returns:
+            The remediation with execution type and metadata set
+        """
+        # Categorize execution type
+        execution_type, metadata = self._categorize_execution(
+            remediation.recommended_action,
+            diagnosis,
+            incident
+        )
+        remediation.execution_type = execution_type
+        remediation.execution_metadata = metadata
+
+        logger.info(
+            "Remediation proposed: %s (risk: %s, execution: %s, requires_approval: %s)",
+            remediation.recommended_action.action_type,
+            remediation.recommended_action.risk_level.value,
+            execution_type.value,
+            remediation.requires_approval
+        )
+
+        return remediation
+
+    def _handle_error(
+        self,
+        incident: IncidentEvent,
+        diagnosis: DiagnosisResult,
+        error: Exception
+    ) -> RemediationResult:
+        """
+        Build the fallback result for a failed remediation
+
+        Args:
+            incident: Incident event
+            diagnosis: Diagnosis result
+            error: Error that occurred
+
+        Returns:
+            Safe fallback RemediationResult (escalated)
+        """
+        logger.error(f"Error in remediation: {str(error)}", exc_info=True)
+        # Return safe fallback action
+        fallback = self._get_fallback_remediation(incident, diagnosis, str(error))
+        # Set execution type for fallback
+        fallback.execution_type = ExecutionType.ESCALATE
+        fallback.execution_metadata = {"reason": f"Agent error: {str(error)}"}
+        return fallback
+
+    def _get_batcher(self) -> _RemediationBatcher:
+        """
+        Get the remediation batcher for the running event loop
+
+        Returns:
+            _RemediationBatcher bound to the current loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._batcher is None or self._batcher.loop is not loop:
+            self._batcher = _RemediationBatcher(self._call_bedrock_async)
+        return self._batcher
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        Get the BEDROCK_TPS semaphore for the running event loop
+
+        Returns:
+            Semaphore bound to the current loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(BEDROCK_TPS)
+            self._sem_loop = loop
+        return self._sem
+
+    async def _call_bedrock_async(self, user_prompt: str, incidents: int = 1) -> str:
+        """
+        Call Bedrock Claude without blocking the event loop
+
+        At most BEDROCK_TPS calls are in flight at once, so a burst of
+        incidents queues here instead of being throttled by Bedrock.
+
+        Args:
+            user_prompt: User prompt with diagnosis
+            incidents: Number of incidents the prompt asks remediations for
+
+        Returns:
+            Response text
+        """
+        loop = asyncio.get_running_loop()
+        async with self._get_semaphore():
+            return await loop.run_in_executor(
+                bedrock_executor, self._call_bedrock, user_prompt, True, incidents
+            )
+
+    def _cache_key(self, user_prompt: str) -> str:
+        """
+        Build the cache key for a remediation prompt
+
+        Args:
+            user_prompt: User prompt with diagnosis
+
+        Returns:
+            Key covering everything that determines the response
+        """
+        return response_cache_key(self.model_id, REMEDIATION_SYSTEM_PROMPT, user_prompt)
+
+    def _call_bedrock(self, user_prompt: str, cache: bool = True, incidents: int = 1) -> str:
         """
         Call Bedrock Claude
 
+        Responses are cached (see utils.response_cache), so a repeated
+        diagnosis doesn't go back to Bedrock. Generation is capped at
+        REMEDIATION_MAX_TOKENS per incident; a response cut off by the cap is
+        requested again with REMEDIATION_TRUNCATED_MAX_TOKENS per incident.
+
         Args:
             user_prompt: User prompt with diagnosis
+            cache: Use a cached response if available (False forces a refresh)
+            incidents: Number of incidents the prompt asks remediations for
+                (scales the output budget)
 
         Returns:
             Response text
         """
+        cache_key = self._cache_key(user_prompt)
+
+        if cache:
+            cached_response = bedrock_response_cache.get(cache_key)
+            if cached_response is not None:
+                logger.debug("Bedrock response cache hit")
+                return cached_response
+
         try:
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 3000,
-                "temperature": 0.2,  # Low temp for safety-critical decisions
-                "system": REMEDIATION_SYSTEM_PROMPT,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": user_prompt
-                    }
-                ]
-            }
-
-            # Invoke model with retry logic for throttling
-            from utils.bedrock_client import invoke_bedrock_with_retry
-            
-            response = invoke_bedrock_with_retry(
-                bedrock_client=self.bedrock_client,
-                model_id=self.model_id,
-                request_body=request_body,
-                max_retries=5,
-                initial_delay=2.0,
-                max_delay=30.0
-            )
+            for max_tokens in (REMEDIATION_MAX_TOKENS * incidents, REMEDIATION_TRUNCATED_MAX_TOKENS * incidents):
+                request_body = _REQUEST_BODY.render(user_prompt, max_tokens=max_tokens, model_id=self.model_id)
+
+                # Stream the response with retry logic for throttling; the
+                # remediation is a JSON object, so stop reading once it's complete
+                response_text, stop_reason = invoke_bedrock_stream(
+                    bedrock_client=self.bedrock_client,
+                    model_id=self.model_id,
+                    request_body=request_body,
+                    stop_after_json=True,
+                    max_retries=5,
+                    initial_delay=2.0,
+                    max_delay=30.0
+                )
+
+                if stop_reason != 'max_tokens':
+                    break
+                logger.warning(f"Remediation response truncated at {max_tokens} tokens")
+            else:
+                # Still truncated; don't cache it so the next attempt asks again
+                return response_text
+
+            # Only cache responses that parse, so a garbled answer isn't
+            # reused for the cache's TTL
+            try:
+                json_utils.extract_json(response_text)
+            except ValueError:
+                logger.warning("Remediation response is not valid JSON, not caching it")
+                return response_text
 
-            response_body = json.loads(response['body'].read())
-            return response_body['content'][0]['text']
+            bedrock_response_cache.put(cache_key, response_text)
+            return response_text
 
         except Exception as e:
             logger.error(f"Bedrock invocation failed: {str(e)}", exc_info=True)
             raise
 
-    def _parse_response(self, response_text: str) -> RemediationResult:
+    def _parse_response(self, response_text: str, cache_key: Optional[str] = None) -> RemediationResult:
         """
         Parse Claude's remediation response
 
         Args:
             response_text: Raw response from Claude
+            cache_key: Cache the result under this key if it parses
 
         Returns:
             Parsed RemediationResult
         """
         try:
-            # Extract JSON
-            if "```json" in response_text:
-                start = response_text.index("```json") + 7
-                end = response_text.index("```", start)
-                json_text = response_text[start:end].strip()
-            elif "{" in response_text:
-                start = response_text.index("{")
-                end = response_text.rindex("}") + 1
-                json_text = response_text[start:end]
-            else:
-                json_text = response_text
-
-            data = json.loads(json_text)
-
-            # Parse recommended action
-            rec_action_data = data.get('recommended_action', {})
-            recommended_action = RemediationAction(
-                action_type=rec_action_data.get('action_type', 'monitor'),
-                description=rec_action_data.get('description', 'Monitor and escalate'),
-                steps=rec_action_data.get('steps', []),
-                estimated_time_minutes=int(rec_action_data.get('estimated_time_minutes', 5)),
-                risk_level=RiskLevel(rec_action_data.get('risk_level', 'MEDIUM')),
-                reversible=rec_action_data.get('reversible', True),
-                rollback_plan=rec_action_data.get('rollback_plan')
-            )
-
-            # Parse alternative actions
-            alternative_actions = []
-            for alt_data in data.get('alternative_actions', []):
-                alternative_actions.append(RemediationAction(
-                    action_type=alt_data.get('action_type', 'monitor'),
-                    description=alt_data.get('description', ''),
-                    steps=alt_data.get('steps', []),
-                    estimated_time_minutes=int(alt_data.get('estimated_time_minutes', 5)),
-                    risk_level=RiskLevel(alt_data.get('risk_level', 'MEDIUM')),
-                    reversible=alt_data.get('reversible', True),
-                    rollback_plan=alt_data.get('rollback_plan')
-                ))
-
-            # Parse execution type (if provided, otherwise will be set by categorization)
-            execution_type_str = data.get('execution_type', 'escalate')
-            try:
-                execution_type = ExecutionType(execution_type_str)
-            except ValueError:
-                execution_type = ExecutionType.ESCALATE
-
-            execution_metadata = data.get('execution_metadata', {})
-
-            return RemediationResult(
-                recommended_action=recommended_action,
-                alternative_actions=alternative_actions,
-                execution_type=execution_type,
-                execution_metadata=execution_metadata,
-                requires_approval=data.get('requires_approval', True),
-                approval_reason=data.get('approval_reason'),
-                success_criteria=data.get('success_criteria', []),
-                monitoring_duration_minutes=int(data.get('monitoring_duration_minutes', 15))
-            )
+            # Extract JSON (parsed directly when the response is bare JSON)
+            remediation = self._result_from_data(json_utils.extract_json(response_text))
+            if cache_key is not None:
+                _remediation_cache.put(cache_key, remediation.model_copy(deep=True))
+            return remediation
 
         except Exception as e:
             logger.error(f"Failed to parse remediation response: {str(e)}", exc_info=True)
-            logger.debug(f"Response text was: {response_text}")
+            logger.debug("Response text was: %s", response_text)
 
             # Return safe fallback
             return RemediationResult(
@@ -244,6 +779,46 @@ class RemediationAgent:
                 execution_metadata={"reason": f"Parsing error: {str(e)}"}
             )
 
+    def _result_from_data(self, data: Dict[str, Any]) -> RemediationResult:
+        """
+        Build a RemediationResult from the remediation JSON
+
+        Args:
+            data: Parsed remediation object
+
+        Returns:
+            RemediationResult
+        """
+        # Parse recommended action
+        recommended_action = _construct_action(
+            data.get('recommended_action', {}), 'Monitor and escalate'
+        )
+
+        # Parse alternative actions
+        alternative_actions = [
+            _construct_action(alt_data, '') for alt_data in data.get('alternative_actions', [])
+        ]
+
+        # Parse execution type (if provided, otherwise will be set by categorization)
+        execution_type_str = data.get('execution_type', 'escalate')
+        try:
+            execution_type = ExecutionType(execution_type_str)
+        except ValueError:
+            execution_type = ExecutionType.ESCALATE
+
+        execution_metadata = data.get('execution_metadata', {})
+
+        return RemediationResult(
+            recommended_action=recommended_action,
+            alternative_actions=alternative_actions,
+            execution_type=execution_type,
+            execution_metadata=execution_metadata,
+            requires_approval=data.get('requires_approval', True),
+            approval_reason=data.get('approval_reason'),
+            success_criteria=data.get('success_criteria', []),
+            monitoring_duration_minutes=int(data.get('monitoring_duration_minutes', 15))
+        )
+
     def _get_fallback_remediation(
         self,
         incident: IncidentEvent,
@@ -315,16 +890,10 @@ class RemediationAgent:
         # Code fix: Bug fixes, logic errors, error handling, config changes
         # Check this FIRST - categories like DEPENDENCY/TIMEOUT/CONFIGURATION should be code fixes
         # even if action is scale/restart (because those actions won't fix the root cause)
-        code_fix_categories = ['BUG', 'LOGIC_ERROR', 'HANDLING', 'TIMEOUT', 'ERROR_HANDLING', 'CODE']
-        code_fix_action_types = ['config_change', 'code_fix', 'fix', 'update_config', 'modify_config']
-        
-        # Also consider DEPENDENCY and CONFIGURATION categories for code fixes
-        # (e.g., payment gateway timeout config needs code changes)
-        extended_code_fix_categories = code_fix_categories + ['DEPENDENCY', 'CONFIGURATION']
         
         # Check if this should be a code fix based on category OR action type
-        is_code_fix_category = category in extended_code_fix_categories
-        is_code_fix_action = any(code_action in action_type for code_action in code_fix_action_types)
+        is_code_fix_category = category in _CODE_FIX_CATEGORIES
+        is_code_fix_action = _CODE_FIX_ACTION_RE.search(action_type) is not None
         
         # PRIORITY: If category suggests code fix (DEPENDENCY, TIMEOUT, CONFIGURATION), 
         # it should be CODE_FIX even if action is scale/restart
@@ -337,13 +906,13 @@ class RemediationAgent:
                 component = diagnosis.component.split(',')[0].strip()
                 if component and component != 'unknown':
                     service_name = component
-                    logger.info(f"Using diagnosis component '{component}' as service name (incident service was unknown)")
+                    logger.info("Using diagnosis component '%s' as service name (incident service was unknown)", component)
             
             # Check if we have a repo mapping
             repo = self._get_repo_for_service(service_name)
             if repo:
                 reason = f"{category} category" if is_code_fix_category else f"{action_type} action type"
-                logger.info(f"Categorizing as CODE_FIX: {reason} (repo: {repo}, service: {service_name})")
+                logger.info("Categorizing as CODE_FIX: %s (repo: %s, service: %s)", reason, repo, service_name)
                 return ExecutionType.CODE_FIX, {
                     'repo': repo,
                     'service': service_name,
@@ -358,14 +927,9 @@ class RemediationAgent:
         # Auto-execute: Safe, reversible operations - CHECK AFTER code_fix
         # Only auto-execute if category doesn't suggest code fix
         # (e.g., RESOURCE category with scale action = auto-execute)
-        auto_execute_actions = [
-            'restart', 'scale', 'clear_cache',
-            'reset_connections', 'enable_feature_flag', 'disable_feature'
-        ]
-
-        if any(auto_action in action_type for auto_action in auto_execute_actions):
+        if _AUTO_EXECUTE_ACTION_RE.search(action_type):
             if risk_level == RiskLevel.LOW and action.reversible:
-                logger.info(f"Categorizing as AUTO_EXECUTE: {action_type} (LOW risk, reversible, category: {category})")
+                logger.info("Categorizing as AUTO_EXECUTE: %s (LOW risk, reversible, category: %s)", action_type, category)
                 return ExecutionType.AUTO_EXECUTE, {
                     'service': incident.service,
                     'action': action_type,
@@ -374,7 +938,7 @@ class RemediationAgent:
                 }
 
         # Escalate: Everything else
-        logger.info(f"Categorizing as ESCALATE: {action_type} (category: {category}, risk: {risk_level.value})")
+        logger.info("Categorizing as ESCALATE: %s (category: %s, risk: %s)", action_type, category, risk_level.value)
         return ExecutionType.ESCALATE, {
             'reason': f"Complex remediation requiring human analysis",
             'action_type': action_type,
@@ -399,28 +963,9 @@ class RemediationAgent:
             GITHUB_ORG: GitHub organization or username (default: "your-org")
             {SERVICE}_SERVICE_REPO: Override for specific service (e.g., PAYMENT_SERVICE_REPO)
         """
-        import os
-        
-        # Get GitHub org/username from environment (default to placeholder)
-        github_org = os.environ.get("GITHUB_ORG", "your-org")
-        
-        # POC service-to-repo mapping (only services with repos)
-        # Format: {org}/poc-{service-name}
-        POC_SERVICES = {
-            "payment-service": "poc-payment-service",
-            "rating-service": "poc-rating-service",
-            "order-service": "poc-order-service",
-        }
-        
-        # Check if service has a POC repo
-        if service_name in POC_SERVICES:
-            repo_name = POC_SERVICES[service_name]
-            # Allow override via environment variable
-            env_key = f"{service_name.upper().replace('-', '_')}_SERVICE_REPO"
-            repo_path = os.environ.get(env_key, f"{github_org}/{repo_name}")
-            logger.info(f"Mapped service {service_name} to repo: {repo_path}")
-            return repo_path
-        
-        # Service not in POC repos
-        logger.info(f"Service {service_name} does not have a repository mapping")
-        return None
+        repo_path = _repo_for_service(service_name)
+        if repo_path:
+            logger.info("Mapped service %s to repo: %s", service_name, repo_path)
+        else:
+            logger.info("Service %s does not have a repository mapping", service_name)
+        return repo_path
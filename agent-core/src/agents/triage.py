@@ -2,15 +2,32 @@
 Triage Agent - Assesses incident severity and determines investigation priority
 """
 
-import json
 import logging
-from typing import Dict, Any
-
-from models.schemas import IncidentEvent, TriageResult, Severity, InvestigationDecision
-from prompts.agent_prompts import TRIAGE_SYSTEM_PROMPT, format_triage_prompt
+from typing import Dict, Any, Optional
+
+from ..models.schemas import IncidentEvent, TriageResult, Severity, InvestigationDecision
+from ..prompts.agent_prompts import TRIAGE_SYSTEM_PROMPT, format_triage_prompt
+from ..utils import json_utils
+from ..utils.bedrock_client import RequestBodyTemplate, invoke_bedrock_with_retry, log_cache_usage
+from ..utils.response_cache import (
+    BEDROCK_RESPONSE_CACHE_SIZE,
+    BEDROCK_RESPONSE_CACHE_TTL_SECONDS,
+    ResponseCache,
+    cache_key as response_cache_key,
+    ratio_bucket
+)
 
 logger = logging.getLogger(__name__)
 
+# Request body with the system prompt pre-serialized and marked for prompt
+# caching (low temperature for consistent reasoning)
+_REQUEST_BODY = RequestBodyTemplate(TRIAGE_SYSTEM_PROMPT, max_tokens=2000, temperature=0.3, cache_system=True)
+
+# Triage results by incident fingerprint (see TriageAgent._fingerprint), so
+# repeats of an alert at a similar level skip the Bedrock call (same size/TTL
+# as the response cache)
+_triage_cache = ResponseCache(BEDROCK_RESPONSE_CACHE_SIZE, BEDROCK_RESPONSE_CACHE_TTL_SECONDS)
+
 
 class TriageAgent:
     """
@@ -41,6 +58,12 @@ class TriageAgent:
         logger.info(f"Triaging incident {incident.incident_id} for service {incident.service}")
 
         try:
+            fingerprint = self._fingerprint(incident)
+            cached_result = _triage_cache.get(fingerprint)
+            if cached_result is not None:
+                logger.info(f"Reusing cached triage for incident {incident.incident_id}")
+                return cached_result.model_copy(deep=True)
+
             # Prepare incident data for prompt
             incident_data = {
                 'service': incident.service,
@@ -62,8 +85,8 @@ class TriageAgent:
             # Call Bedrock
             response = self._call_bedrock(user_prompt)
 
-            # Parse response
-            triage_result = self._parse_response(response)
+            # Parse response (cached for equivalent incidents if it parses)
+            triage_result = self._parse_response(response, fingerprint)
 
             logger.info(
                 f"Triage complete: {triage_result.severity.value} - {triage_result.decision.value}"
@@ -94,37 +117,22 @@ class TriageAgent:
             Response text from Claude
         """
         try:
-            # Prepare request body for Bedrock
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2000,
-                "temperature": 0.3,  # Low temperature for consistent reasoning
-                "system": TRIAGE_SYSTEM_PROMPT,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": user_prompt
-                    }
-                ]
-            }
-
             # Invoke model with retry logic for throttling
-            from utils.bedrock_client import invoke_bedrock_with_retry
-            
             response = invoke_bedrock_with_retry(
                 bedrock_client=self.bedrock_client,
                 model_id=self.model_id,
-                request_body=request_body,
+                request_body=_REQUEST_BODY.render(user_prompt, model_id=self.model_id),
                 max_retries=5,
                 initial_delay=2.0,  # Start with 2 second delay
                 max_delay=30.0     # Max 30 seconds between retries
             )
 
             # Parse response
-            response_body = json.loads(response['body'].read())
+            response_body = json_utils.loads(response['body'].read())
+            log_cache_usage(self.model_id, response_body.get('usage'))
             response_text = response_body['content'][0]['text']
 
-            logger.debug(f"Bedrock response: {response_text}")
+            logger.debug("Bedrock response: %s", response_text)
 
             return response_text
 
@@ -132,35 +140,23 @@ class TriageAgent:
             logger.error(f"Bedrock invocation failed: {str(e)}", exc_info=True)
             raise
 
-    def _parse_response(self, response_text: str) -> TriageResult:
+    def _parse_response(self, response_text: str, cache_key: Optional[str] = None) -> TriageResult:
         """
         Parse Claude's response into TriageResult
 
         Args:
             response_text: Raw response from Claude
+            cache_key: Cache the result under this key if it parses
 
         Returns:
             Parsed TriageResult
         """
         try:
             # Extract JSON from response (Claude sometimes includes explanation text)
-            # Look for JSON block
-            if "```json" in response_text:
-                start = response_text.index("```json") + 7
-                end = response_text.index("```", start)
-                json_text = response_text[start:end].strip()
-            elif "{" in response_text and "}" in response_text:
-                start = response_text.index("{")
-                end = response_text.rindex("}") + 1
-                json_text = response_text[start:end]
-            else:
-                json_text = response_text
-
-            # Parse JSON
-            data = json.loads(json_text)
+            data = json_utils.extract_json(response_text)
 
             # Create TriageResult
-            return TriageResult(
+            triage_result = TriageResult(
                 severity=Severity(data.get('severity', 'P3')),
                 decision=InvestigationDecision(data.get('decision', 'INVESTIGATE')),
                 priority=int(data.get('priority', 5)),
@@ -169,10 +165,13 @@ class TriageAgent:
                 similar_incidents=data.get('similar_incidents', []),
                 affected_customers=data.get('affected_customers')
             )
+            if cache_key is not None:
+                _triage_cache.put(cache_key, triage_result.model_copy(deep=True))
+            return triage_result
 
         except Exception as e:
             logger.error(f"Failed to parse triage response: {str(e)}", exc_info=True)
-            logger.debug(f"Response text was: {response_text}")
+            logger.debug("Response text was: %s", response_text)
             # Return conservative default
             return TriageResult(
                 severity=Severity.P2,
@@ -183,6 +182,32 @@ class TriageAgent:
                 similar_incidents=[]
             )
 
+    def _fingerprint(self, incident: IncidentEvent) -> str:
+        """
+        Build the triage cache key for an incident
+
+        Alerts for the same service, alarm and metric that are about as far
+        past their threshold (see ratio_bucket) get the same triage; the
+        timestamp, description and raw values don't matter. A chat-triggered
+        investigation is triaged separately, since its prompt differs.
+
+        Args:
+            incident: Incident event
+
+        Returns:
+            Cache key
+        """
+        return response_cache_key(
+            self.model_id,
+            incident.service,
+            incident.service_tier,
+            incident.alert_name,
+            incident.metric,
+            ratio_bucket(incident.value, incident.threshold),
+            self._get_recent_deployments(incident),
+            incident.raw_event.get('source') == 'chat_query'
+        )
+
     def _get_recent_deployments(self, incident: IncidentEvent) -> str:
         """
         Get recent deployments for the service
@@ -74,6 +74,7 @@ class IncidentEvent(BaseModel):
 
     # AWS metadata
     log_group: Optional[str] = Field(None, description="CloudWatch Log Group")
+    log_groups: List[str] = Field(default_factory=list, description="Additional CloudWatch Log Groups of correlated services")
     aws_account: Optional[str] = Field(None, description="AWS account ID")
     aws_region: str = Field(default="us-east-1", description="AWS region")
 
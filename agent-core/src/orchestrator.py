@@ -2,6 +2,7 @@
 LangGraph Orchestrator - Coordinates the agent workflow
 """
 
+import asyncio
 import os
 import logging
 import time
@@ -13,7 +14,7 @@ import boto3
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 
-from models.schemas import (
+from .models.schemas import (
     IncidentEvent,
     InvestigationState,
     InvestigationResult,
@@ -22,11 +23,51 @@ from models.schemas import (
     RemediationResult,
     DiagnosisResult
 )
-from agents import TriageAgent, AnalysisAgent, DiagnosisAgent, RemediationAgent
-from integrations.github_client import GitHubClient
+from .agents import TriageAgent, AnalysisAgent, DiagnosisAgent, RemediationAgent
+from .integrations.github_client import GitHubClient
 
 logger = logging.getLogger(__name__)
 
+# Ask for the diagnosis and its remediation in one Bedrock call, saving a
+# round-trip per incident. Off by default: the combined call bypasses the
+# diagnosis caches, so repeated alerts are served by Bedrock.
+PIPELINE_DIAGNOSIS_REMEDIATION = os.environ.get('PIPELINE_DIAGNOSIS_REMEDIATION', 'false').lower() == 'true'
+
+# GitHub token resolved once per process (see InvestigationOrchestrator._get_github_token)
+_github_token: Optional[str] = None
+
+
+def _load_github_token() -> Optional[str]:
+    """
+    Load GitHub token from SSM Parameter Store, falling back to GITHUB_TOKEN
+
+    Returns:
+        GitHub token or None
+    """
+    # Try SSM Parameter Store first (production)
+    ssm_param_name = os.environ.get('GITHUB_TOKEN_SSM_PARAM')
+    if ssm_param_name:
+        try:
+            ssm = boto3.client('ssm')
+            response = ssm.get_parameter(Name=ssm_param_name, WithDecryption=True)
+            token = response['Parameter']['Value']
+            if token and token != 'CHANGE_ME':
+                logger.info(f"GitHub token retrieved from SSM: {ssm_param_name}")
+                return token
+            else:
+                logger.warning(f"GitHub token in SSM is not set (value: {token})")
+        except Exception as e:
+            logger.warning(f"Failed to get GitHub token from SSM {ssm_param_name}: {e}")
+
+    # Fallback to environment variable (for local development)
+    github_token = os.environ.get('GITHUB_TOKEN')
+    if github_token:
+        logger.info("GitHub token retrieved from environment variable")
+        return github_token
+
+    logger.info("No GitHub token configured (SSM or env var)")
+    return None
+
 
 class InvestigationOrchestrator:
     """
@@ -73,39 +114,22 @@ class InvestigationOrchestrator:
     def _get_github_token(self) -> Optional[str]:
         """
         Get GitHub token from SSM Parameter Store or environment variable
-        
+
         Priority:
         1. SSM Parameter Store (if GITHUB_TOKEN_SSM_PARAM is set)
         2. Environment variable GITHUB_TOKEN (for local development)
-        
+
+        The token is resolved once per process and reused by every orchestrator,
+        so warm Lambda invocations don't repeat the SSM round-trip.
+
         Returns:
             GitHub token or None
         """
-        import boto3
-        
-        # Try SSM Parameter Store first (production)
-        ssm_param_name = os.environ.get('GITHUB_TOKEN_SSM_PARAM')
-        if ssm_param_name:
-            try:
-                ssm = boto3.client('ssm')
-                response = ssm.get_parameter(Name=ssm_param_name, WithDecryption=True)
-                token = response['Parameter']['Value']
-                if token and token != 'CHANGE_ME':
-                    logger.info(f"GitHub token retrieved from SSM: {ssm_param_name}")
-                    return token
-                else:
-                    logger.warning(f"GitHub token in SSM is not set (value: {token})")
-            except Exception as e:
-                logger.warning(f"Failed to get GitHub token from SSM {ssm_param_name}: {e}")
-        
-        # Fallback to environment variable (for local development)
-        github_token = os.environ.get('GITHUB_TOKEN')
-        if github_token:
-            logger.info("GitHub token retrieved from environment variable")
-            return github_token
-        
-        logger.info("No GitHub token configured (SSM or env var)")
-        return None
+        global _github_token
+
+        if _github_token is None:
+            _github_token = _load_github_token()
+        return _github_token
 
     def _build_workflow(self) -> StateGraph:
         """
@@ -225,7 +249,6 @@ class InvestigationOrchestrator:
 
         try:
             # Small delay to avoid rate limiting after triage
-            import asyncio
             await asyncio.sleep(0.5)
             
             analysis_result = await self.analysis_agent.analyze(
@@ -247,7 +270,7 @@ class InvestigationOrchestrator:
 
         return updates
 
-    def _diagnosis_node(self, state: InvestigationState) -> dict:
+    async def _diagnosis_node(self, state: InvestigationState) -> dict:
         """
         Diagnosis node - determine root cause
 
@@ -263,7 +286,7 @@ class InvestigationOrchestrator:
 
         try:
             # Small delay to avoid rate limiting after analysis
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             # Safely extract analysis result - LangGraph might pass it as dict or object
             analysis = state.analysis
             if analysis is None:
@@ -271,16 +294,23 @@ class InvestigationOrchestrator:
                 raise ValueError("Analysis result is missing")
             
             # Log the type for debugging
-            logger.debug(f"[DIAGNOSIS] analysis type: {type(analysis)}")
+            logger.debug("[DIAGNOSIS] analysis type: %s", type(analysis))
             
             # Ensure incident is properly typed
             incident = state.incident
-            logger.debug(f"[DIAGNOSIS] incident type: {type(incident)}")
-            
-            diagnosis_result = self.diagnosis_agent.diagnose(
-                incident,
-                analysis
-            )
+            logger.debug("[DIAGNOSIS] incident type: %s", type(incident))
+
+            chained = None
+            if PIPELINE_DIAGNOSIS_REMEDIATION:
+                chained = await self._diagnose_and_remediate(incident, analysis)
+
+            if chained is not None:
+                diagnosis_result, updates["remediation"] = chained
+            else:
+                diagnosis_result = await self.diagnosis_agent.diagnose_async(
+                    incident,
+                    analysis
+                )
             updates["diagnosis"] = diagnosis_result
 
             logger.info(
@@ -296,7 +326,34 @@ class InvestigationOrchestrator:
 
         return updates
 
-    def _remediation_node(self, state: InvestigationState) -> dict:
+    async def _diagnose_and_remediate(
+        self,
+        incident: IncidentEvent,
+        analysis: Any
+    ) -> Optional[tuple]:
+        """
+        Diagnose and propose remediation in one Bedrock call
+
+        Args:
+            incident: Incident event
+            analysis: Analysis result
+
+        Returns:
+            (DiagnosisResult, RemediationResult), or None to run the agents separately
+        """
+        try:
+            diagnosis_prompt = self.diagnosis_agent.build_prompt(incident, analysis)
+        except Exception as e:
+            logger.warning(f"[DIAGNOSIS] Could not build combined prompt: {e}")
+            return None
+
+        return await self.remediation_agent.propose_from_prompt_chain_async(
+            incident,
+            diagnosis_prompt,
+            self.diagnosis_agent.parse_data
+        )
+
+    async def _remediation_node(self, state: InvestigationState) -> dict:
         """
         Remediation node - propose fixes
 
@@ -310,13 +367,17 @@ class InvestigationOrchestrator:
 
         updates = {"current_step": "remediation"}
 
+        if state.remediation is not None:
+            logger.info("[REMEDIATION] Already proposed together with the diagnosis")
+            return updates
+
         try:
             # Small delay to avoid rate limiting after diagnosis
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
             
             # Ensure we have a diagnosis (remediation needs it)
             if not state.diagnosis:
-                from models.schemas import DiagnosisResult
+                from .models.schemas import DiagnosisResult
                 logger.warning("[REMEDIATION] No diagnosis available, using fallback")
                 state.diagnosis = DiagnosisResult(
                     root_cause="Unknown - diagnosis unavailable",
@@ -328,7 +389,7 @@ class InvestigationOrchestrator:
                     reasoning="Diagnosis step failed or was skipped"
                 )
             
-            remediation_result = self.remediation_agent.propose_remediation(
+            remediation_result = await self.remediation_agent.propose_remediation_async(
                 state.incident,
                 state.diagnosis
             )
@@ -346,7 +407,7 @@ class InvestigationOrchestrator:
             updates["errors"] = errors
             
             # Provide fallback remediation result even on error
-            from models.schemas import RemediationResult, RemediationAction, RiskLevel
+            from .models.schemas import RemediationResult, RemediationAction, RiskLevel
             updates["remediation"] = RemediationResult(
                 recommended_action=RemediationAction(
                     action_type="monitor_and_escalate",
@@ -887,7 +948,7 @@ Confidence: {diagnosis.confidence}%
             recommended_action = remediation.recommended_action
         else:
             # Fallback action when remediation fails or is missing
-            from models.schemas import RemediationAction, RiskLevel
+            from .models.schemas import RemediationAction, RiskLevel
             recommended_action = RemediationAction(
                 action_type="monitor_and_escalate",
                 description="Remediation analysis unavailable. Manual investigation required.",
@@ -998,7 +1059,7 @@ Confidence: {diagnosis.confidence}%
         Returns:
             InvestigationResult with error info
         """
-        from models.schemas import RemediationAction, RiskLevel, Severity
+        from .models.schemas import RemediationAction, RiskLevel, Severity
 
         # Create minimal state
         error_state = InvestigationState(
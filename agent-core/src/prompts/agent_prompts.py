@@ -73,6 +73,10 @@ Query Generation Best Practices:
 - Look for ERROR, WARN, EXCEPTION, timeout, and similar patterns
 - Correlate with deployment events and configuration changes
 - Query multiple relevant log groups if service has dependencies
+- Aggregate in the query instead of returning raw records: use stats count() by bin(1m) for
+  timing and "pattern @message | sort @sampleCount desc | limit 20" to cluster messages;
+  only fetch raw messages (with a small limit) when exact lines are needed, e.g. to trace
+  a correlation ID
 
 Analysis Approach:
 1. Start with error patterns in the affected service
@@ -110,6 +114,8 @@ TASK:
        - Use filter @message like /CORRELATION_ID/ to trace the correlation ID across services
        - Generate queries for ALL services mentioned in services_involved (not just the primary service)
        - Each query should target a specific service or pattern
+       - Set time_window_minutes to the narrowest window the query needs (e.g. 15 for the most
+         recent errors); omit it to search the whole time window
 
        First, provide the queries you want to run in this format:
        {{
@@ -117,7 +123,8 @@ TASK:
            {{
              "name": "error_spike_detection",
              "query": "fields @timestamp, @message | filter level = 'ERROR' | ...",
-             "purpose": "Identify error patterns"
+             "purpose": "Identify error patterns",
+             "time_window_minutes": 60
            }},
            ...
          ]
@@ -148,6 +155,12 @@ Based on these findings, provide your analysis in valid JSON format (no control
 
 CRITICAL: Return ONLY valid JSON. Escape all newlines in string values as \\n. Do not include any control characters."""
 
+ANALYSIS_FOLLOW_UP_INSTRUCTIONS = """
+
+These results come from a standard set of error queries. If they are not enough to identify what went wrong, also include in the JSON:
+  "additional_queries": [{{"name": "query_name", "query": "CloudWatch Insights query", "purpose": "what this finds", "time_window_minutes": 30}}]
+with at most {max_queries} targeted queries to run next. Omit "additional_queries" if the results are sufficient."""
+
 # ============================================
 # Diagnosis Agent Prompts
 # ============================================
@@ -327,6 +340,48 @@ EXECUTION TYPE GUIDELINES:
   - Unknown root causes
   - No clear fix path"""
 
+# ============================================
+# Pipelined Diagnosis + Remediation Prompts
+# ============================================
+
+DIAGNOSIS_REMEDIATION_SYSTEM_PROMPT = f"""{DIAGNOSIS_SYSTEM_PROMPT}
+
+Once the root cause is determined, you also propose the remediation for it, acting as the remediation agent below.
+
+{REMEDIATION_SYSTEM_PROMPT}"""
+
+# Appended to the diagnosis prompt (not formatted, so braces are literal)
+DIAGNOSIS_REMEDIATION_INSTRUCTIONS = """
+
+ALSO PROPOSE REMEDIATION:
+Instead of the diagnosis object alone, return ONE JSON object with the diagnosis first and the remediation for that root cause second:
+{
+  "diagnosis": { the diagnosis object described above },
+  "remediation": {
+    "recommended_action": {
+      "action_type": "restart|scale|rollback|config_change|code_fix",
+      "description": "Human-readable description",
+      "steps": ["step1", "step2", ...],
+      "estimated_time_minutes": number,
+      "risk_level": "LOW|MEDIUM|HIGH",
+      "reversible": true|false,
+      "rollback_plan": "How to undo if needed"
+    },
+    "execution_type": "auto_execute|code_fix|escalate",
+    "execution_metadata": {},
+    "alternative_actions": [ same structure as recommended_action ],
+    "requires_approval": true|false,
+    "approval_reason": "Why approval is needed (if applicable)",
+    "success_criteria": ["criterion1", "criterion2", ...],
+    "monitoring_duration_minutes": number
+  }
+}
+
+EXECUTION TYPE GUIDELINES:
+- "auto_execute": safe, reversible operations (restart, scale, clear cache) with LOW risk and no code changes
+- "code_fix": bugs, logic errors, error handling or timeout issues that need code or config changes
+- "escalate": high risk or multi-service changes, unknown root causes, no clear fix path"""
+
 # ============================================
 # Helper Functions
 # ============================================
@@ -532,3 +587,8 @@ def format_remediation_prompt(diagnosis_result: dict, incident: dict) -> str:
         current_state=incident.get('current_state', 'degraded'),
         supporting_evidence=diagnosis_result.get('supporting_evidence', [])
     )
+
+
+def format_diagnosis_remediation_prompt(diagnosis_prompt: str) -> str:
+    """Extend a formatted diagnosis prompt to ask for the remediation in the same response"""
+    return diagnosis_prompt + DIAGNOSIS_REMEDIATION_INSTRUCTIONS
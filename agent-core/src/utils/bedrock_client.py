@@ -4,33 +4,278 @@ Bedrock Client Utilities - Retry logic and throttling handling
 
 import json
 import logging
+import os
+import random
+import re
+import threading
 import time
-from typing import Dict, Any, Optional
-from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, Tuple, Union
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, ParamValidationError
+
+from . import json_utils
 
 logger = logging.getLogger(__name__)
 
+# Process-wide cap on in-flight Bedrock requests. Agents call Bedrock from worker
+# threads, so this is a threading semaphore shared by every agent and incident.
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get('BEDROCK_MAX_CONCURRENCY', '8'))
+_bedrock_semaphore = threading.BoundedSemaphore(BEDROCK_MAX_CONCURRENCY)
+
+# Threads for async callers to run blocking Bedrock calls on, so they don't
+# compete with (or starve) the event loop's default executor
+bedrock_executor = ThreadPoolExecutor(
+    max_workers=BEDROCK_MAX_CONCURRENCY,
+    thread_name_prefix='bedrock'
+)
+
+# Pooled HTTP connections per Bedrock Runtime client (botocore defaults to 10);
+# never fewer than the requests allowed in flight
+BEDROCK_MAX_POOL_CONNECTIONS = max(
+    int(os.environ.get('BEDROCK_MAX_POOL_CONNECTIONS', '32')),
+    BEDROCK_MAX_CONCURRENCY
+)
+
+# HTTP settings for Bedrock Runtime clients: enough pooled connections for every
+# concurrent request, kept alive between invocations
+BEDROCK_CLIENT_CONFIG = Config(
+    max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    tcp_keepalive=True,
+    read_timeout=60
+)
+
+# Request latency-optimized inference where the model supports it
+BEDROCK_LATENCY_OPTIMIZED = os.environ.get('BEDROCK_LATENCY_OPTIMIZED', 'true').lower() == 'true'
+
+# Model families with latency-optimized inference (matched anywhere in the model
+# ID so cross-region inference profiles like "us.anthropic..." match too)
+_LATENCY_OPTIMIZED_MODELS = (
+    'anthropic.claude-3-5-haiku',
+    'meta.llama3-1-70b',
+    'meta.llama3-1-405b',
+    'amazon.nova-pro',
+)
+
+# Mark stable system prompts for Bedrock prompt caching where the model supports it
+BEDROCK_PROMPT_CACHING = os.environ.get('BEDROCK_PROMPT_CACHING', 'true').lower() == 'true'
+
+# Model families with prompt caching (matched anywhere in the model ID)
+_PROMPT_CACHING_MODELS = (
+    'anthropic.claude-3-5-haiku',
+    'anthropic.claude-3-7-sonnet',
+    'anthropic.claude-sonnet-4',
+    'anthropic.claude-opus-4',
+)
+
+# Models that rejected latency-optimized inference in this process
+_latency_optimized_rejected = set()
+
+# Models that rejected response streaming in this process
+_streaming_rejected = set()
+
+# Consecutive failed Bedrock calls (after retries) before a model's circuit
+# opens, and how long calls then fail fast before one is let through again
+BEDROCK_CIRCUIT_FAIL_MAX = int(os.environ.get('BEDROCK_CIRCUIT_FAIL_MAX', '5'))
+BEDROCK_CIRCUIT_RESET_SECONDS = float(os.environ.get('BEDROCK_CIRCUIT_RESET_SECONDS', '60'))
+
+# Error codes caused by the request itself rather than Bedrock's health; these
+# don't count towards opening the circuit
+_CALLER_ERROR_CODES = frozenset({
+    'validationexception',
+    'accessdeniedexception',
+    'resourcenotfoundexception',
+})
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Characters that change JSON nesting while a streamed object is scanned
+_JSON_STRUCTURE_RE = re.compile(r'[{}"\\]')
+
+
+def create_bedrock_client(region_name: Optional[str] = None, session=None):
+    """
+    Create a Bedrock Runtime client with a connection pool sized for concurrency
+
+    Args:
+        region_name: AWS region (default: from the environment)
+        session: Optional boto3 Session to create the client from
+
+    Returns:
+        Boto3 Bedrock Runtime client
+    """
+    if session is None:
+        session = boto3.session.Session()
+
+    return session.client('bedrock-runtime', region_name=region_name, config=BEDROCK_CLIENT_CONFIG)
+
+
+def check_client_pool(bedrock_client) -> None:
+    """
+    Warn if a caller-built client has fewer pooled connections than requests in flight
+
+    Requests beyond the pool size wait for a connection or open new ones
+    (with a fresh TLS handshake) instead of reusing one.
+
+    Args:
+        bedrock_client: Boto3 Bedrock Runtime client
+    """
+    config = getattr(getattr(bedrock_client, 'meta', None), 'config', None)
+    pool_size = getattr(config, 'max_pool_connections', None)
+
+    if isinstance(pool_size, int) and pool_size < BEDROCK_MAX_CONCURRENCY:
+        logger.warning(
+            f"Bedrock client pool has {pool_size} connections for up to "
+            f"{BEDROCK_MAX_CONCURRENCY} concurrent requests; use create_bedrock_client()"
+        )
+
+
+class RequestBodyTemplate:
+    """
+    Anthropic messages request body with everything but the user prompt pre-serialized
+
+    The system prompt is often several KB and never changes, so it is encoded
+    once instead of on every call. With cache_system, it is also marked as a
+    prompt caching checkpoint for models that support it, so Bedrock reuses
+    the processed prefix instead of reading it again. Bedrock only caches
+    prefixes above the model's minimum length (1,024 tokens for Sonnet);
+    shorter ones are processed as usual.
+    """
+
+    def __init__(self, system: str, max_tokens: int, temperature: float, cache_system: bool = False):
+        """
+        Initialize the template
+
+        Args:
+            system: System prompt
+            max_tokens: Default maximum tokens to generate
+            temperature: Sampling temperature
+            cache_system: Mark the system prompt for prompt caching
+        """
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self._prefix = self._build_prefix(system)
+        self._cached_prefix = self._build_prefix([
+            {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+        ]) if cache_system else self._prefix
+
+    def _build_prefix(self, system: Any) -> str:
+        """
+        Serialize the request body up to the user prompt
+
+        Args:
+            system: System prompt (string or content blocks)
+
+        Returns:
+            Body prefix ending where the user prompt goes
+        """
+        head = json_utils.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "temperature": self.temperature,
+            "system": system
+        })
+        return head[:-1] + ',"messages":[{"role":"user","content":'
+
+    def render(self, user_prompt: str, max_tokens: Optional[int] = None, model_id: Optional[str] = None) -> str:
+        """
+        Build the JSON request body for a user prompt
+
+        Args:
+            user_prompt: User prompt
+            max_tokens: Maximum tokens to generate (default: the template's)
+            model_id: Bedrock model ID the body is sent to (enables prompt
+                caching if the template and model support it)
+
+        Returns:
+            Serialized request body
+        """
+        prefix = self._cached_prefix if model_id and _use_prompt_caching(model_id) else self._prefix
+        return (
+            f'{prefix}{json_utils.dumps(user_prompt)}}}],'
+            f'"max_tokens":{int(max_tokens or self.max_tokens)}}}'
+        )
+
+
+def _use_prompt_caching(model_id: str) -> bool:
+    """
+    Check whether to mark prompts for caching for a model
+
+    Args:
+        model_id: Bedrock model ID
+
+    Returns:
+        True if enabled and the model supports it
+    """
+    return BEDROCK_PROMPT_CACHING and any(family in model_id for family in _PROMPT_CACHING_MODELS)
+
+
+def log_cache_usage(model_id: str, usage: Optional[Dict[str, Any]]) -> None:
+    """
+    Log how much of a request's input was read from or written to the prompt cache
+
+    Args:
+        model_id: Bedrock model ID
+        usage: Usage block from the response (or the stream's message_start)
+    """
+    if usage and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Prompt cache for %s: %s tokens read, %s written, %s uncached",
+            model_id,
+            usage.get('cache_read_input_tokens', 0),
+            usage.get('cache_creation_input_tokens', 0),
+            usage.get('input_tokens', 0)
+        )
+
+
+def _use_latency_optimized(model_id: str) -> bool:
+    """
+    Check whether to request latency-optimized inference for a model
+
+    Args:
+        model_id: Bedrock model ID
+
+    Returns:
+        True if enabled and the model supports it
+    """
+    return (
+        BEDROCK_LATENCY_OPTIMIZED
+        and model_id not in _latency_optimized_rejected
+        and any(family in model_id for family in _LATENCY_OPTIMIZED_MODELS)
+    )
+
 
 def invoke_bedrock_with_retry(
     bedrock_client,
     model_id: str,
-    request_body: Dict[str, Any],
+    request_body: Union[Dict[str, Any], str],
     max_retries: int = 5,
     initial_delay: float = 1.0,
     max_delay: float = 60.0,
-    backoff_multiplier: float = 2.0
+    backoff_multiplier: float = 2.0,
+    latency_optimized: bool = True
 ) -> Dict[str, Any]:
     """
     Invoke Bedrock model with exponential backoff retry for throttling
+
+    At most BEDROCK_MAX_CONCURRENCY requests (default 8) are in flight at once;
+    the slot is released while backing off so waiting callers can proceed.
+    Retry delays are jittered so throttled callers don't retry in lockstep.
+    Latency-optimized inference is requested for models that support it
+    (disable with BEDROCK_LATENCY_OPTIMIZED=false); if Bedrock rejects it in
+    this region, the call is retried with standard inference.
     
     Args:
         bedrock_client: Boto3 Bedrock Runtime client
         model_id: Bedrock model ID
-        request_body: Request body for Bedrock API
+        request_body: Request body for Bedrock API (dict, or already serialized)
         max_retries: Maximum number of retry attempts
         initial_delay: Initial delay in seconds before first retry
         max_delay: Maximum delay between retries
         backoff_multiplier: Multiplier for exponential backoff
+        latency_optimized: Request latency-optimized inference if supported
         
     Returns:
         Response from Bedrock API
@@ -38,40 +283,422 @@ def invoke_bedrock_with_retry(
     Raises:
         ClientError: If all retries are exhausted
     """
+    body = request_body if isinstance(request_body, str) else json_utils.dumps(request_body)
+
+    def invoke(invoke_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return bedrock_client.invoke_model(
+            modelId=model_id,
+            body=body,
+            **invoke_kwargs
+        )
+
+    return _invoke_with_retry(
+        invoke, model_id, max_retries, initial_delay, max_delay, backoff_multiplier, 'InvokeModel',
+        latency_optimized
+    )
+
+
+def invoke_bedrock_stream(
+    bedrock_client,
+    model_id: str,
+    request_body: Union[Dict[str, Any], str],
+    stop_after_json: bool = False,
+    max_retries: int = 5,
+    initial_delay: float = 1.0,
+    max_delay: float = 60.0,
+    backoff_multiplier: float = 2.0,
+    latency_optimized: bool = True
+) -> Tuple[str, Optional[str]]:
+    """
+    Invoke a Claude model with response streaming, returning text and stop reason
+
+    Text deltas are collected as they arrive instead of waiting for the whole
+    response body. With stop_after_json, the stream is closed as soon as the
+    first complete top-level JSON object has been generated, so trailing
+    commentary isn't waited for. Concurrency, throttling retries and
+    latency-optimized inference behave as in invoke_bedrock_with_retry.
+    Models that don't support streaming fall back to invoke_model.
+
+    Args:
+        bedrock_client: Boto3 Bedrock Runtime client
+        model_id: Bedrock model ID
+        request_body: Anthropic messages request body (dict, or already serialized,
+            e.g. from RequestBodyTemplate.render)
+        stop_after_json: Stop reading once a complete JSON object is generated
+        max_retries: Maximum number of retry attempts
+        initial_delay: Initial delay in seconds before first retry
+        max_delay: Maximum delay between retries
+        backoff_multiplier: Multiplier for exponential backoff
+        latency_optimized: Request latency-optimized inference if supported
+
+    Returns:
+        (generated text, stop reason such as "end_turn" or "max_tokens"; None
+        if the stream was closed early after the JSON)
+
+    Raises:
+        ClientError: If all retries are exhausted
+    """
+    body = request_body if isinstance(request_body, str) else json_utils.dumps(request_body)
+
+    def invoke(invoke_kwargs: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        response = bedrock_client.invoke_model_with_response_stream(
+            modelId=model_id,
+            body=body,
+            **invoke_kwargs
+        )
+        stream = response['body']
+        text = []
+        stop_reason = None
+        tracker = _JsonObjectTracker() if stop_after_json else None
+
+        try:
+            for event in stream:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+
+                payload = json_utils.loads(chunk['bytes'])
+                if payload.get('type') == 'message_start':
+                    log_cache_usage(model_id, payload.get('message', {}).get('usage'))
+                if payload.get('type') == 'message_delta':
+                    stop_reason = payload.get('delta', {}).get('stop_reason')
+                if payload.get('type') != 'content_block_delta':
+                    continue
+
+                delta = payload.get('delta', {}).get('text', '')
+                text.append(delta)
+
+                if tracker is not None and tracker.feed(delta):
+                    # Confirm once; braces in prose before the object can
+                    # fool the scanner, in which case read to the end
+                    generated = ''.join(text)
+                    if _is_complete_json(generated, generated.find('{')):
+                        logger.debug("Complete JSON received, closing Bedrock stream early")
+                        break
+                    tracker = None
+        finally:
+            stream.close()
+
+        return ''.join(text), stop_reason
+
+    if model_id not in _streaming_rejected:
+        try:
+            return _invoke_with_retry(
+                invoke, model_id, max_retries, initial_delay, max_delay, backoff_multiplier,
+                'InvokeModelWithResponseStream', latency_optimized
+            )
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            if (error.get('Code', '').lower() != 'validationexception'
+                    or 'stream' not in error.get('Message', '').lower()):
+                raise
+            logger.warning(f"Response streaming not supported for {model_id}, using InvokeModel")
+            _streaming_rejected.add(model_id)
+
+    response = invoke_bedrock_with_retry(
+        bedrock_client, model_id, request_body, max_retries, initial_delay, max_delay, backoff_multiplier,
+        latency_optimized
+    )
+    response_body = json_utils.loads(response['body'].read())
+    log_cache_usage(model_id, response_body.get('usage'))
+    text = ''.join(block.get('text', '') for block in response_body.get('content', []))
+    return text, response_body.get('stop_reason')
+
+
+def invoke_bedrock_stream_with_retry(
+    bedrock_client,
+    model_id: str,
+    request_body: Union[Dict[str, Any], str],
+    stop_after_json: bool = False,
+    max_retries: int = 5,
+    initial_delay: float = 1.0,
+    max_delay: float = 60.0,
+    backoff_multiplier: float = 2.0,
+    latency_optimized: bool = True
+) -> str:
+    """
+    Invoke a Claude model with response streaming and return the generated text
+
+    See invoke_bedrock_stream, which also reports why generation stopped.
+
+    Args:
+        bedrock_client: Boto3 Bedrock Runtime client
+        model_id: Bedrock model ID
+        request_body: Anthropic messages request body (dict, or already serialized,
+            e.g. from RequestBodyTemplate.render)
+        stop_after_json: Stop reading once a complete JSON object is generated
+        max_retries: Maximum number of retry attempts
+        initial_delay: Initial delay in seconds before first retry
+        max_delay: Maximum delay between retries
+        backoff_multiplier: Multiplier for exponential backoff
+        latency_optimized: Request latency-optimized inference if supported
+
+    Returns:
+        Generated text
+
+    Raises:
+        ClientError: If all retries are exhausted
+    """
+    return invoke_bedrock_stream(
+        bedrock_client, model_id, request_body, stop_after_json, max_retries, initial_delay, max_delay,
+        backoff_multiplier, latency_optimized
+    )[0]
+
+
+class _JsonObjectTracker:
+    """
+    Incrementally tracks whether the first JSON object in streamed text is closed
+
+    Each delta is scanned once for braces, quotes and escapes, so the
+    generated text doesn't have to be re-joined and re-parsed on every chunk.
+    """
+
+    def __init__(self):
+        """
+        Initialize the tracker
+        """
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, delta: str) -> bool:
+        """
+        Scan the next text delta
+
+        Args:
+            delta: Newly generated text
+
+        Returns:
+            True once the first top-level object has been closed
+        """
+        pos = 0
+        if self.escaped and delta:
+            # The previous delta ended with a backslash inside a string
+            self.escaped = False
+            pos = 1
+
+        while True:
+            match = _JSON_STRUCTURE_RE.search(delta, pos)
+            if match is None:
+                return False
+            char = match.group()
+            pos = match.end()
+
+            if self.in_string:
+                if char == '"':
+                    self.in_string = False
+                elif char == '\\':
+                    if pos < len(delta):
+                        pos += 1
+                    else:
+                        self.escaped = True
+            elif char == '{':
+                self.depth += 1
+                self.started = True
+            elif not self.started:
+                continue
+            elif char == '"':
+                self.in_string = True
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+
+
+def _is_complete_json(text: str, start: int) -> bool:
+    """
+    Check whether text holds a complete JSON value starting at start
+
+    Args:
+        text: Generated text so far
+        start: Index of the opening brace
+
+    Returns:
+        True if the value parses
+    """
+    try:
+        _JSON_DECODER.raw_decode(text, start)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+class _CircuitBreaker:
+    """
+    Per-model circuit breaker for Bedrock calls
+
+    After fail_max consecutive failures the model's circuit opens and calls
+    fail immediately for reset_seconds, so a Bedrock outage sends agents to
+    their fallbacks at once instead of every call sitting through its full
+    retry schedule. After that, calls are let through again; the first
+    success closes the circuit, the next failure reopens it.
+    """
+
+    def __init__(self, fail_max: int, reset_seconds: float):
+        """
+        Initialize the breaker
+
+        Args:
+            fail_max: Consecutive failures that open a model's circuit
+            reset_seconds: Seconds an open circuit rejects calls
+        """
+        self.fail_max = fail_max
+        self.reset_seconds = reset_seconds
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def check(self, model_id: str, operation_name: str) -> None:
+        """
+        Fail fast if the model's circuit is open
+
+        Args:
+            model_id: Bedrock model ID
+            operation_name: API operation name for the error
+
+        Raises:
+            ClientError: With code CircuitOpen while the circuit is open
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(model_id)
+            if opened_at is None or time.monotonic() - opened_at >= self.reset_seconds:
+                return
+
+        raise ClientError(
+            {'Error': {
+                'Code': 'CircuitOpen',
+                'Message': f"{model_id} failed {self.fail_max} consecutive calls; "
+                           f"not calling it for {self.reset_seconds:.0f}s"
+            }},
+            operation_name
+        )
+
+    def record_success(self, model_id: str) -> None:
+        """
+        Close the model's circuit
+
+        Args:
+            model_id: Bedrock model ID
+        """
+        with self._lock:
+            self._failures.pop(model_id, None)
+            self._opened_at.pop(model_id, None)
+
+    def record_failure(self, model_id: str) -> None:
+        """
+        Count a failed call, opening the circuit at fail_max
+
+        Args:
+            model_id: Bedrock model ID
+        """
+        with self._lock:
+            failures = self._failures.get(model_id, 0) + 1
+            self._failures[model_id] = failures
+            if failures >= self.fail_max:
+                logger.error(f"Bedrock circuit open for {model_id} after {failures} consecutive failures")
+                self._opened_at[model_id] = time.monotonic()
+
+
+# Shared by every agent in this process
+_circuit_breaker = _CircuitBreaker(BEDROCK_CIRCUIT_FAIL_MAX, BEDROCK_CIRCUIT_RESET_SECONDS)
+
+
+def _invoke_with_retry(
+    invoke: Callable[[Dict[str, Any]], Any],
+    model_id: str,
+    max_retries: int,
+    initial_delay: float,
+    max_delay: float,
+    backoff_multiplier: float,
+    operation_name: str,
+    latency_optimized: bool = True
+) -> Any:
+    """
+    Run a Bedrock call with concurrency limiting and throttling retries
+
+    Calls to a model whose recent calls kept failing are rejected without
+    contacting Bedrock (see _CircuitBreaker).
+
+    Args:
+        invoke: Performs the call given extra invoke_model kwargs
+        model_id: Bedrock model ID
+        max_retries: Maximum number of retry attempts
+        initial_delay: Initial delay in seconds before first retry
+        max_delay: Maximum delay between retries
+        backoff_multiplier: Multiplier for exponential backoff
+        operation_name: API operation name for the final error
+        latency_optimized: Request latency-optimized inference if supported
+
+    Returns:
+        Result of invoke
+
+    Raises:
+        ClientError: If all retries are exhausted or the model's circuit is open
+    """
+    _circuit_breaker.check(model_id, operation_name)
     delay = initial_delay
-    
+
     for attempt in range(max_retries):
+        invoke_kwargs = {}
+        if latency_optimized and _use_latency_optimized(model_id):
+            invoke_kwargs['performanceConfigLatency'] = 'optimized'
+
         try:
-            response = bedrock_client.invoke_model(
-                modelId=model_id,
-                body=json.dumps(request_body)
-            )
-            return response
-            
+            with _bedrock_semaphore:
+                result = invoke(invoke_kwargs)
+            _circuit_breaker.record_success(model_id)
+            return result
+
+        except ParamValidationError:
+            if not invoke_kwargs:
+                raise
+            # botocore too old to know performanceConfigLatency
+            logger.warning("Latency-optimized inference not supported by botocore, using standard")
+            _latency_optimized_rejected.add(model_id)
+            continue
+
         except ClientError as e:
+            # Errors raised mid-stream use lower-camel codes (throttlingException)
             error_code = e.response.get('Error', {}).get('Code', '')
+            error_message = e.response.get('Error', {}).get('Message', '').lower()
+
+            # Only a rejection of the latency setting itself; any other
+            # validation error would fail the same way without it
+            if (error_code.lower() == 'validationexception' and invoke_kwargs
+                    and ('performanceconfig' in error_message or 'latency' in error_message)):
+                logger.warning(
+                    f"Latency-optimized inference rejected for {model_id}, using standard: {str(e)}"
+                )
+                _latency_optimized_rejected.add(model_id)
+                continue
             
             # Only retry on throttling errors
-            if error_code == 'ThrottlingException' and attempt < max_retries - 1:
+            if error_code.lower() == 'throttlingexception' and attempt < max_retries - 1:
+                sleep_for = delay * random.uniform(0.5, 1.0)
                 logger.warning(
                     f"Bedrock throttling (attempt {attempt + 1}/{max_retries}): "
-                    f"Retrying in {delay:.1f}s..."
+                    f"Retrying in {sleep_for:.1f}s..."
                 )
-                time.sleep(delay)
+                time.sleep(sleep_for)
                 delay = min(delay * backoff_multiplier, max_delay)
                 continue
             else:
                 # Not a throttling error, or max retries reached
                 logger.error(f"Bedrock invocation failed: {error_code} - {str(e)}")
+                if error_code.lower() not in _CALLER_ERROR_CODES:
+                    _circuit_breaker.record_failure(model_id)
                 raise
                 
         except Exception as e:
-            # Non-ClientError exceptions - don't retry
+            # Non-ClientError exceptions (connection errors, read timeouts) - don't retry
             logger.error(f"Bedrock invocation failed with unexpected error: {str(e)}")
+            _circuit_breaker.record_failure(model_id)
             raise
     
     # Should never reach here, but just in case
+    _circuit_breaker.record_failure(model_id)
     raise ClientError(
         {'Error': {'Code': 'MaxRetriesExceeded', 'Message': 'Max retries exceeded'}},
-        'InvokeModel'
+        operation_name
     )
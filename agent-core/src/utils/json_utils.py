@@ -0,0 +1,128 @@
+"""
+JSON Utilities - Fast serialization with an orjson fast path
+"""
+
+import json
+import logging
+import re
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# orjson is optional; fall back to the standard library if it isn't installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    logger.debug("orjson not available, using json")
+    ORJSON_AVAILABLE = False
+
+# JSON repair for LLM output: string literals (which may contain raw control
+# characters), escapes for control characters inside them, and removal of
+# control characters outside them
+_JSON_FENCE = "```json"
+_JSON_DECODER = json.JSONDecoder()
+_JSON_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_STRING_ESCAPE_TABLE = str.maketrans(
+    {chr(c): ' ' for c in (*range(32), 127)}
+    | {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}
+)
+_CTRL_TABLE = str.maketrans({c: None for c in (*range(32), 127) if c not in (9, 10, 13)})
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize an object to a compact JSON string
+
+    Values JSON can't represent (datetimes, enums, ...) are converted with str().
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        JSON string
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str).decode()
+    return json.dumps(obj, default=str, separators=(',', ':'))
+
+
+def loads(data: Any) -> Any:
+    """
+    Parse JSON from a string or bytes
+
+    Args:
+        data: JSON document
+
+    Returns:
+        Parsed object
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def extract_json(text: str) -> Any:
+    """
+    Extract and parse the JSON object from an LLM response
+
+    Takes the contents of a ```json fence if there is one (the closing fence
+    may be missing when a stream stopped right after the JSON), otherwise the
+    first object in the text, ignoring anything after it. Raw control
+    characters, which models sometimes emit inside strings, are repaired if
+    the first parse fails.
+
+    Args:
+        text: Raw model response
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        json.JSONDecodeError: If no JSON can be parsed, even after repair
+    """
+    # Fast path: the response is nothing but the object, so skip the scans
+    stripped = text.strip()
+    if stripped.startswith("{") and stripped.endswith("}"):
+        try:
+            return loads(stripped)
+        except ValueError:
+            pass
+
+    _, fence, fenced = text.partition(_JSON_FENCE)
+    if fence:
+        json_text, start = fenced.partition("```")[0].strip(), 0
+    else:
+        start = text.find("{")
+        json_text, start = (text, start) if start != -1 else (text.strip(), 0)
+
+    # orjson only parses whole documents, so skip it when prose follows the
+    # object rather than parsing the object twice
+    if ORJSON_AVAILABLE and json_text.rstrip().endswith("}"):
+        try:
+            return orjson.loads(json_text[start:])
+        except orjson.JSONDecodeError:
+            pass
+
+    # raw_decode stops at the end of the object, so trailing prose is never
+    # scanned or copied
+    try:
+        return _JSON_DECODER.raw_decode(json_text, start)[0]
+    except json.JSONDecodeError as parse_error:
+        logger.warning(f"Initial JSON parse failed: {parse_error}, attempting repair...")
+
+    # Escape control characters inside string values, then drop any left
+    # outside strings
+    json_text = _JSON_STRING_RE.sub(
+        lambda match: match.group(0).translate(_STRING_ESCAPE_TABLE),
+        json_text[start:]
+    ).translate(_CTRL_TABLE)
+
+    try:
+        return _JSON_DECODER.raw_decode(json_text)[0]
+    except json.JSONDecodeError as second_error:
+        logger.error(f"JSON parse still failing after repair: {second_error}")
+        start = max(0, second_error.pos - 200)
+        logger.error(f"Problematic section around position {second_error.pos}: "
+                     f"{json_text[start:second_error.pos + 200]}")
+        raise
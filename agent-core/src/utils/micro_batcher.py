@@ -0,0 +1,175 @@
+"""
+Micro Batcher - Packs prompts submitted close together into one Bedrock call
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+from . import json_utils
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher(ABC):
+    """
+    Packs per-incident prompts submitted close together into one Bedrock call
+
+    Prompts are collected until max_batch_size are pending or max_latency_ms
+    has passed since the first one, then sent as a single request asking for
+    a {"results": [...]} object with one element per incident. A lone prompt
+    is sent unchanged, and if the combined response can't be split back into
+    one result per incident each prompt is sent on its own. Bound to the
+    event loop it was created on.
+
+    Subclasses provide the combined prompt (_build_batch_prompt) and turn each
+    result back into the response text a single call would have returned
+    (_result_text).
+    """
+
+    # What the prompts ask for, used in log messages
+    name = "prompt"
+
+    def __init__(self, call, max_batch_size: int = 4, max_latency_ms: int = 50):
+        """
+        Initialize the batcher
+
+        Args:
+            call: Coroutine function sending one prompt to Bedrock, returning text
+            max_batch_size: Flush as soon as this many prompts are pending
+            max_latency_ms: Longest a prompt waits for others to join its batch
+        """
+        self._call = call
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self.loop = asyncio.get_running_loop()
+        self._pending: List[tuple] = []
+        self._flush_handle = None
+        self._tasks = set()
+
+    async def submit(self, prompt: str) -> str:
+        """
+        Queue a prompt and wait for its response
+
+        Args:
+            prompt: Prompt for one incident
+
+        Returns:
+            Response text for the prompt
+        """
+        future = self.loop.create_future()
+        self._pending.append((prompt, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self.max_latency_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send all pending prompts as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self.loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]) -> None:
+        """
+        Resolve each submitter's future from one (or, on fallback, several) calls
+
+        Args:
+            batch: (prompt, future) pairs
+        """
+        prompts = [prompt for prompt, _ in batch]
+
+        try:
+            if len(prompts) == 1:
+                responses = [await self._call(prompts[0])]
+            else:
+                responses = await self._run_batched(prompts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def _run_batched(self, prompts: List[str]) -> List[str]:
+        """
+        Answer several prompts in one Bedrock call
+
+        Falls back to one call per prompt if the combined response can't be
+        split back into one result per incident.
+
+        Args:
+            prompts: Prompts, one per incident
+
+        Returns:
+            One response text per prompt, in order
+        """
+        logger.info("Sending %d %s prompts in one Bedrock call", len(prompts), self.name)
+
+        sections = "\n\n".join(
+            f"=== Incident {i} ===\n{prompt}" for i, prompt in enumerate(prompts, 1)
+        )
+        response = await self._call_batch(self._build_batch_prompt(len(prompts), sections), len(prompts))
+
+        try:
+            data = json_utils.extract_json(response)
+            results = data.get('results')
+            if (isinstance(results, list) and len(results) == len(prompts)
+                    and all(isinstance(result, dict) for result in results)):
+                return [self._result_text(result) for result in results]
+        except (ValueError, AttributeError):
+            pass
+
+        logger.warning(f"Batched {self.name} response unusable, sending prompts individually")
+        return list(await asyncio.gather(*[self._call(prompt) for prompt in prompts]))
+
+    async def _call_batch(self, prompt: str, incidents: int) -> str:
+        """
+        Send the combined prompt
+
+        Args:
+            prompt: Combined prompt
+            incidents: Number of incidents it covers
+
+        Returns:
+            Response text
+        """
+        return await self._call(prompt)
+
+    @abstractmethod
+    def _build_batch_prompt(self, incidents: int, sections: str) -> str:
+        """
+        Build the combined prompt
+
+        Args:
+            incidents: Number of incidents
+            sections: The per-incident prompts, each under an "=== Incident N ===" header
+
+        Returns:
+            Prompt asking for {"results": [...]} with one element per incident
+        """
+
+    def _result_text(self, result: Dict[str, Any]) -> str:
+        """
+        Turn one element of the combined response into a single-prompt response
+
+        Args:
+            result: Result object for one incident
+
+        Returns:
+            Response text
+        """
+        return json_utils.dumps(result)
@@ -0,0 +1,233 @@
+"""
+Response Cache - Bounded, expiring cache for model responses
+"""
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+# Number of Bedrock responses kept per process
+BEDROCK_RESPONSE_CACHE_SIZE = int(os.environ.get('BEDROCK_RESPONSE_CACHE_SIZE', '512'))
+
+# How long a cached Bedrock response is reused (flapping alerts repeat within minutes)
+BEDROCK_RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('BEDROCK_RESPONSE_CACHE_TTL_SECONDS', '600'))
+
+# DynamoDB table sharing diagnosis responses between Lambda instances (unset disables it)
+DIAGNOSIS_CACHE_TABLE = os.environ.get('DIAGNOSIS_CACHE_TABLE', '')
+
+# How long a shared diagnosis response is reused
+DIAGNOSIS_CACHE_TTL_SECONDS = int(os.environ.get('DIAGNOSIS_CACHE_TTL_SECONDS', '3600'))
+
+# Numbers and whitespace runs folded by normalize_text
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Build a cache key from the inputs that determine a response
+
+    Args:
+        *parts: Model ID, prompts, sampling parameters, ...
+
+    Returns:
+        Hex digest of the parts
+    """
+    return hashlib.blake2b(
+        "\0".join(str(part) for part in parts).encode(),
+        digest_size=16
+    ).hexdigest()
+
+
+def normalize_text(text: Any) -> str:
+    """
+    Normalize free text for fingerprinting
+
+    Case, whitespace and numbers (counts, IDs, durations) don't change what
+    the text describes, so they are folded.
+
+    Args:
+        text: Text such as a root cause
+
+    Returns:
+        Normalized text
+    """
+    return _WHITESPACE_RE.sub(' ', _NUMBER_RE.sub('#', str(text or '').lower())).strip()
+
+
+def ratio_bucket(value: float, threshold: float) -> Any:
+    """
+    Bucket how far a metric is past its threshold
+
+    Buckets are a quarter of a doubling wide, so alerts at e.g. 2.1x and 2.3x
+    the threshold share one.
+
+    Args:
+        value: Metric value
+        threshold: Alert threshold
+
+    Returns:
+        Bucket number (or a marker for ratios that can't be bucketed)
+    """
+    if not threshold:
+        return 'no-threshold'
+    ratio = value / threshold
+    if not math.isfinite(ratio):
+        return 'non-finite'
+    if ratio <= 0:
+        return 'non-positive'
+    return math.floor(math.log2(ratio) * 4)
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed time
+
+    Agents call Bedrock from worker threads, so every access is locked.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize: Maximum number of entries (least recently used are evicted)
+            ttl_seconds: Seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class DynamoDBResponseCache:
+    """
+    Response cache in a DynamoDB table, shared by every process and Lambda instance
+
+    The table has a string hash key "cache_key" and TTL on "expires_at".
+    DynamoDB deletes expired items lazily, so reads check the expiry too.
+    The cache is best-effort: DynamoDB errors are logged and treated as misses.
+    """
+
+    def __init__(self, table_name: str, ttl_seconds: int, dynamodb_client=None):
+        """
+        Initialize the cache
+
+        Args:
+            table_name: DynamoDB table name
+            ttl_seconds: Seconds an entry stays valid
+            dynamodb_client: Optional boto3 DynamoDB client (created on first use)
+        """
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self._client = dynamodb_client
+
+    @property
+    def client(self):
+        """Boto3 DynamoDB client, created on first use"""
+        if self._client is None:
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing, expired or unavailable
+        """
+        try:
+            item = self.client.get_item(
+                TableName=self.table_name,
+                Key={'cache_key': {'S': key}},
+                ProjectionExpression='#v, expires_at',
+                ExpressionAttributeNames={'#v': 'value'}
+            ).get('Item')
+        except (BotoCoreError, ClientError) as e:
+            logger.warning(f"Shared cache read from {self.table_name} failed: {e}")
+            return None
+
+        if not item or int(item['expires_at']['N']) <= time.time():
+            return None
+        return item['value']['S']
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    'cache_key': {'S': key},
+                    'value': {'S': value},
+                    'expires_at': {'N': str(int(time.time() + self.ttl_seconds))}
+                }
+            )
+        except (BotoCoreError, ClientError) as e:
+            logger.warning(f"Shared cache write to {self.table_name} failed: {e}")
+
+
+# Bedrock responses shared by all agents in this process; survives across warm
+# Lambda invocations
+bedrock_response_cache = ResponseCache(BEDROCK_RESPONSE_CACHE_SIZE, BEDROCK_RESPONSE_CACHE_TTL_SECONDS)
+
+# Diagnosis responses shared across Lambda instances (None unless DIAGNOSIS_CACHE_TABLE is set)
+diagnosis_shared_cache = (
+    DynamoDBResponseCache(DIAGNOSIS_CACHE_TABLE, DIAGNOSIS_CACHE_TTL_SECONDS) if DIAGNOSIS_CACHE_TABLE else None
+)
@@ -191,3 +191,26 @@ resource "aws_dynamodb_table" "chat_sessions" {
     Name = "${var.project_name}-chat-sessions"
   }
 }
+
+# DynamoDB Table: Diagnosis Cache
+# Bedrock diagnosis responses keyed by evidence hash, shared by all Lambda instances
+resource "aws_dynamodb_table" "diagnosis_cache" {
+  name         = "${var.project_name}-diagnosis-cache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "cache_key"
+
+  attribute {
+    name = "cache_key"
+    type = "S"
+  }
+
+  # TTL configuration (entries expire after DIAGNOSIS_CACHE_TTL_SECONDS)
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Name = "${var.project_name}-diagnosis-cache"
+  }
+}
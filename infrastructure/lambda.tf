@@ -41,6 +41,7 @@ resource "aws_lambda_function" "incident_handler" {
         MEMORY_TABLE            = aws_dynamodb_table.memory.name
         REMEDIATION_STATE_TABLE = aws_dynamodb_table.remediation_state.name
         CHAT_SESSIONS_TABLE     = aws_dynamodb_table.chat_sessions.name
+        DIAGNOSIS_CACHE_TABLE   = aws_dynamodb_table.diagnosis_cache.name
 
         # Knowledge Base Tables
         KB_DOCUMENTS_TABLE = aws_dynamodb_table.kb_documents.name
@@ -18,6 +18,7 @@ import agent_core
 from agent_core.orchestrator import InvestigationOrchestrator
 from agent_core.models.schemas import IncidentEvent, DiagnosisResult, RemediationResult
 from agent_core.models.schemas import ExecutionType
+from agent_core.utils.bedrock_client import create_bedrock_client
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -264,7 +265,7 @@ async def create_github_issue_handler(event: Dict[str, Any], context: Any) -> Di
             raise ValueError(f"Invalid remediation data: {str(e)}")
         
         # Initialize orchestrator (needs bedrock_client and mcp_client)
-        bedrock_client = boto3.client('bedrock-runtime', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+        bedrock_client = create_bedrock_client(region_name=os.environ.get('AWS_REGION', 'us-east-1'))
         
         # MCP client not needed for issue creation, but orchestrator requires it
         # Pass None - orchestrator will handle it gracefully
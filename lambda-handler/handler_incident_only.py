@@ -18,7 +18,6 @@ logger.setLevel(logging.INFO)
 
 
 # Import our modules
-# Import agent_core package first to set up sys.path
 import agent_core
 
 # Now import the actual classes from their modules
@@ -26,6 +25,7 @@ import boto3
 import secrets
 import string
 from agent_core.agent_core import AgentCore
+from agent_core.utils.bedrock_client import create_bedrock_client
 from mcp_client.mcp_client import create_mcp_client
 from storage.storage import create_storage
 
@@ -37,8 +37,8 @@ def generate_short_incident_id(prefix: str = 'inc') -> str:
     return f"{prefix}-{random_id}"
 
 
-# Initialize clients (outside handler for reuse)
-bedrock_client = boto3.client('bedrock-runtime')
+# Initialize clients (outside handler for reuse; pooled keep-alive connections)
+bedrock_client = create_bedrock_client()
 
 # Environment variables
 MCP_ENDPOINT = os.environ.get('MCP_ENDPOINT')
@@ -18,6 +18,7 @@ import uuid
 # Import AgentCore components
 import agent_core
 from agent_core.agent_core import AgentCore
+from agent_core.utils.bedrock_client import create_bedrock_client
 from mcp_client.mcp_client import create_mcp_client
 from storage.storage import create_storage
 
@@ -35,7 +36,7 @@ def generate_short_incident_id(prefix: str = 'chat') -> str:
 
 
 # Initialize clients (outside handler for reuse)
-bedrock_client = boto3.client('bedrock-runtime')
+bedrock_client = create_bedrock_client()
 dynamodb = boto3.resource('dynamodb')
 
 # Environment variables
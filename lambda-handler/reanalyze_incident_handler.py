@@ -9,7 +9,6 @@ import os
 import asyncio
 from typing import Dict, Any
 from datetime import datetime
-import boto3
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -17,11 +16,12 @@ logger.setLevel(logging.INFO)
 # Import our modules
 import agent_core
 from agent_core.agent_core import AgentCore
+from agent_core.utils.bedrock_client import create_bedrock_client
 from mcp_client.mcp_client import create_mcp_client
 from storage.storage import create_storage
 
 # Initialize clients (outside handler for reuse)
-bedrock_client = boto3.client('bedrock-runtime')
+bedrock_client = create_bedrock_client()
 
 # Environment variables
 MCP_ENDPOINT = os.environ.get('MCP_ENDPOINT')
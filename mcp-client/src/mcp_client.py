@@ -14,6 +14,9 @@ import aiohttp
 
 logger = logging.getLogger(__name__)
 
+# CloudWatch Logs Insights limit on log groups per StartQuery
+MAX_LOG_GROUPS_PER_QUERY = 50
+
 
 class MCPClient:
     """
@@ -107,6 +110,74 @@ class MCPClient:
             logger.error(f"Log search failed: {str(e)}", exc_info=True)
             raise MCPError(f"Failed to search logs: {str(e)}") from e
 
+    async def search_logs_multi(
+        self,
+        log_group_names: List[str],
+        query: str,
+        start_time: str,
+        end_time: str,
+        limit: Optional[int] = 100
+    ) -> Dict[str, Any]:
+        """
+        Run one Logs Insights query across several log groups
+
+        CloudWatch Logs Insights accepts up to 50 log groups per query, so this
+        replaces one search_logs round-trip per log group. Records carry an
+        '@log' field ("account-id:log-group-name") identifying their log group.
+
+        Args:
+            log_group_names: CloudWatch Log Group names (at most 50)
+            query: CloudWatch Logs Insights query
+            start_time: Start time (ISO format)
+            end_time: End time (ISO format)
+            limit: Maximum number of results
+
+        Returns:
+            Query results dictionary (same structure as search_logs)
+
+        Raises:
+            MCPError: If query fails
+        """
+        if len(log_group_names) > MAX_LOG_GROUPS_PER_QUERY:
+            raise ValueError(
+                f"At most {MAX_LOG_GROUPS_PER_QUERY} log groups per query, got {len(log_group_names)}"
+            )
+
+        logger.debug(f"Searching logs in {len(log_group_names)} log groups: {query}")
+
+        payload = {
+            "method": "search_logs",
+            "params": {
+                "log_group_names": log_group_names,
+                "query": query,
+                "start_time": start_time,
+                "end_time": end_time,
+                "limit": limit
+            }
+        }
+
+        try:
+            result = await self._call_mcp(payload)
+
+            results = result.get('results', [])
+            statistics = result.get('statistics', {})
+
+            logger.info(
+                f"Log search complete across {len(log_group_names)} log groups: "
+                f"{len(results)} results, {statistics.get('recordsScanned', 0)} records scanned"
+            )
+
+            return {
+                'results': results,
+                'statistics': statistics,
+                'status': result.get('status', 'Complete'),
+                'execution_time_ms': statistics.get('executionTimeMillis')
+            }
+
+        except Exception as e:
+            logger.error(f"Log search failed: {str(e)}", exc_info=True)
+            raise MCPError(f"Failed to search logs: {str(e)}") from e
+
     async def get_log_events(
         self,
         log_group_name: str,